@@ -1,10 +1,11 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
 import os
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__, 
                 template_folder='../templates',
                 static_folder='../static')
@@ -19,10 +20,135 @@ def create_app():
     app.config['APPLICATION_ROOT'] = '/'
     app.config['PREFERRED_URL_SCHEME'] = 'http'
 
+    # Admin endpoints: set a token to allow non-local access
+    app.config['ADMIN_TOKEN'] = None
+
+    # Background prefetch of latest order PDFs after a successful search
+    app.config['PDF_PREFETCH_ENABLED'] = False
+    app.config['PDF_CACHE_DIR'] = None  # defaults to <instance>/pdf_cache
+    app.config['PDF_CACHE_MAX_BYTES'] = 256 * 1024 * 1024
+    app.config['PDF_CACHE_MAX_AGE'] = 7 * 86400  # seconds
+
+    # Sampling profiler for index and the search/analyze APIs; disabled
+    # unless a sample rate or a trusted X-Profile-Token value is set
+    app.config['PROFILE_SAMPLE_RATE'] = 0.0
+    app.config['PROFILE_TOKEN'] = None
+    app.config['PROFILE_KEEP'] = 20
+    app.config['PROFILE_DIR'] = None  # defaults to <instance>/profiles
+
+    # QueryLog rows older than this are rolled into daily aggregates by
+    # `flask rollup-logs`; set an archive dir to keep them as JSONL
+    app.config['QUERYLOG_RETENTION_DAYS'] = 30
+    app.config['QUERYLOG_ARCHIVE_DIR'] = None
+
+    # Upstream scraping; hedging re-issues searches slower than the
+    # observed p95 on a second session, within a 5% extra-load budget
+    app.config['SCRAPER_TIMEOUT'] = 30
+    app.config['SCRAPER_HEDGING'] = False
+    app.config['SCRAPER_POOL_SIZE'] = 4
+    app.config['SCRAPER_HEDGE_PERCENTILE'] = 95
+    app.config['SCRAPER_HEDGE_BUDGET'] = 0.05
+
+    # Admission control for searches: per-client token buckets (by
+    # X-API-Key, else IP) and a global cap on concurrent upstream lookups,
+    # of which bulk API traffic may use only a share
+    app.config['ADMISSION_ENABLED'] = True
+    app.config['ADMISSION_CLIENT_RATE'] = 2.0  # searches per second
+    app.config['ADMISSION_CLIENT_BURST'] = 20
+    app.config['ADMISSION_MAX_IN_FLIGHT'] = 16
+    app.config['ADMISSION_BULK_SHARE'] = 0.5
+
+    # gzip/brotli compression of text responses above a size threshold
+    # (brotli is used when the optional `brotli` package is installed)
+    app.config['COMPRESS_ENABLED'] = True
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    app.config['COMPRESS_LEVEL'] = 6
+
+    # Server-side case contexts for /api/ask follow-up questions
+    app.config['CONTEXT_TTL'] = 1800
+    app.config['CONTEXT_MAXSIZE'] = 2048
+
+    # Compiled templates persist across restarts; heavy template blocks
+    # are cached as fragments keyed by a hash of their inputs
+    app.config['JINJA_BYTECODE_CACHE'] = True
+    app.config['JINJA_CACHE_DIR'] = None  # defaults to <instance>/jinja_cache
+    app.config['FRAGMENT_CACHE_ENABLED'] = True
+    app.config['FRAGMENT_CACHE_SIZE'] = 512
+    app.config['FRAGMENT_CACHE_TTL'] = 3600
+
+    # Output of `flask build-static`: fingerprinted, precompressed copies
+    # of static/ served from /assets with immutable cache headers
+    app.config['STATIC_BUILD_DIR'] = None  # defaults to <instance>/static_build
+
+    # Shared state for multi-worker serving (see serve.py): result caches,
+    # rate limits, contexts and viewstate tokens live in one SQLite file
+    app.config['SHARED_STATE_ENABLED'] = False
+    app.config['SHARED_STATE_PATH'] = None  # defaults to <instance>/shared_state.db
+    app.config['SCRAPER_VIEWSTATE_TTL'] = 0  # seconds a viewstate token is reused; 0 disables
+
+    # Court backends searched in parallel; extra ASP.NET portals (e.g. the
+    # original-side listing) are dicts with name, search_url and case_types
+    app.config['BACKEND_TIMEOUT'] = 60
+    app.config['BACKEND_MAX_WORKERS'] = 16
+    app.config['ASPNET_BACKENDS'] = []
+
+    # Any setting can be overridden from the environment with a COURT_
+    # prefix; values are parsed as JSON, e.g. COURT_SERVER_NAME=null
+    app.config.from_prefixed_env('COURT')
+
+    if config:
+        app.config.update(config)
+
+    # orjson-backed JSON for jsonify/tojson when available
+    from .serializers import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     db.init_app(app)
 
+    if app.config['JINJA_BYTECODE_CACHE']:
+        cache_dir = app.config['JINJA_CACHE_DIR'] or os.path.join(app.instance_path, 'jinja_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    from .fragments import fragment_cache
+    fragment_cache.init_app(app)
+
+    from .assets import static_assets
+    static_assets.init_app(app)
+
+    from .shared_state import shared_state
+    shared_state.init_app(app)
+
+    from .scraper import scraper, case_cache
+    scraper.init_app(app)
+    case_cache.configure(shared_state.make_cache)
+
+    from .backends import backend_registry
+    backend_registry.init_app(app)
+
+    from .prefetch import pdf_prefetcher
+    pdf_prefetcher.init_app(app)
+
+    from .admission import admission_controller
+    admission_controller.init_app(app)
+
+    from .contexts import case_contexts
+    case_contexts.init_app(app)
+
+    from .http_cache import response_compressor
+    response_compressor.init_app(app)
+
     # Import routes
     from .routes import main as main_blueprint
     app.register_blueprint(main_blueprint)
 
+    from .admin import admin as admin_blueprint
+    app.register_blueprint(admin_blueprint)
+
+    from .profiler import request_profiler
+    request_profiler.init_app(app)
+
+    from .commands import register_commands
+    register_commands(app)
+
     return app
@@ -0,0 +1,85 @@
+from functools import wraps
+from flask import Blueprint, current_app, request, jsonify, abort, send_file
+from .admission import admission_controller
+from .backends import backend_registry
+from .contexts import case_contexts
+from .fragments import fragment_cache
+from .prefetch import pdf_prefetcher
+from .profiler import request_profiler
+from .scraper import case_cache, scraper
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+def admin_required(view):
+    """Require the X-Admin-Token header, or a loopback client if no token is configured"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        token = current_app.config.get('ADMIN_TOKEN')
+        if token:
+            if request.headers.get('X-Admin-Token') != token:
+                abort(403)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapped
+
+@admin.route('/prefetch')
+@admin_required
+def prefetch_stats():
+    """PDF prefetch queue and hit-rate counters"""
+    return jsonify(pdf_prefetcher.stats())
+
+@admin.route('/cache')
+@admin_required
+def cache_stats():
+    """Case lookup cache counters"""
+    return jsonify(case_cache.stats())
+
+@admin.route('/contexts')
+@admin_required
+def context_stats():
+    """Case context store size and hit counters"""
+    return jsonify(case_contexts.stats())
+
+@admin.route('/fragments')
+@admin_required
+def fragment_stats():
+    """Template fragment cache hits and misses per fragment"""
+    return jsonify(fragment_cache.stats())
+
+@admin.route('/backends')
+@admin_required
+def backend_stats():
+    """Per-backend call, hit, error and timeout counters"""
+    return jsonify(backend_registry.stats())
+
+@admin.route('/admission')
+@admin_required
+def admission_stats():
+    """In-flight searches and admission/shedding counters"""
+    return jsonify(admission_controller.stats())
+
+@admin.route('/hedging')
+@admin_required
+def hedging_stats():
+    """Hedge rate, wins and latency saved by hedged upstream searches"""
+    return jsonify(scraper.hedging.stats())
+
+@admin.route('/profiles')
+@admin_required
+def profiles():
+    """Index of the slowest profiled requests"""
+    return jsonify({
+        'enabled': request_profiler.enabled,
+        'sample_rate': request_profiler.sample_rate,
+        'profiles': request_profiler.slowest()
+    })
+
+@admin.route('/profiles/<filename>')
+@admin_required
+def profile_file(filename):
+    """Collapsed-stack file for one profiled request"""
+    path = request_profiler.profile_path(filename)
+    if not path:
+        abort(404)
+    return send_file(path, mimetype='text/plain')
@@ -0,0 +1,135 @@
+"""
+Admission control and load shedding in front of upstream case lookups
+"""
+
+import logging
+import math
+import threading
+from contextlib import contextmanager
+
+from flask import request
+
+from .cache import TTLCache
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+# Priority classes: interactive form searches may use every in-flight slot,
+# bulk API traffic only a share of them
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+
+class AdmissionRejected(Exception):
+    """Raised when a lookup is shed; carries the HTTP status and Retry-After"""
+
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.message = message
+
+    @property
+    def headers(self):
+        return {'Retry-After': str(self.retry_after)}
+
+
+class AdmissionController:
+    """
+    Bounds the upstream work the app accepts.
+
+    Each client (API key, else IP address) has a token bucket; a client that
+    runs dry gets 429. A global in-flight limit keeps the number of
+    concurrent upstream lookups bounded; beyond it requests get 503 at once
+    instead of queueing. Bulk traffic is shed first, at BULK_SHARE of the
+    limit, so interactive searches keep headroom during spikes.
+
+    With the shared state backend the client buckets are shared by all
+    workers; the in-flight limit stays per worker process.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.client_rate = 2.0
+        self.client_burst = 20
+        self.max_in_flight = 16
+        self.bulk_share = 0.5
+        self._buckets = TTLCache(maxsize=10000, ttl=600)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ADMISSION_ENABLED', True)
+        self.client_rate = app.config.get('ADMISSION_CLIENT_RATE', 2.0)
+        self.client_burst = app.config.get('ADMISSION_CLIENT_BURST', 20)
+        self.max_in_flight = app.config.get('ADMISSION_MAX_IN_FLIGHT', 16)
+        self.bulk_share = app.config.get('ADMISSION_BULK_SHARE', 0.5)
+        self._buckets.clear()
+
+    @staticmethod
+    def client_key():
+        api_key = request.headers.get('X-API-Key')
+        if api_key:
+            return f"key:{api_key}"
+        return f"ip:{request.remote_addr}"
+
+    def _bucket(self, client):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = shared_state.make_bucket(f"client:{client}", rate=self.client_rate,
+                                                  capacity=self.client_burst)
+            self._buckets.set(client, bucket)
+            return bucket
+
+    def limit_for(self, priority):
+        if priority == INTERACTIVE:
+            return self.max_in_flight
+        return max(1, int(self.max_in_flight * self.bulk_share))
+
+    @contextmanager
+    def admit(self, priority=BULK):
+        """Hold an in-flight slot for the duration of the block, or raise AdmissionRejected"""
+        if not self.enabled:
+            yield
+            return
+
+        bucket = self._bucket(self.client_key())
+        if not bucket.try_acquire():
+            with self._lock:
+                self.rate_limited += 1
+            raise AdmissionRejected(429, max(1, math.ceil(bucket.wait_time())),
+                                    'Too many searches, please slow down and retry shortly')
+
+        with self._lock:
+            if self.in_flight >= self.limit_for(priority):
+                self.shed += 1
+                logger.warning(f"Shedding {priority} search: {self.in_flight} lookups in flight")
+                raise AdmissionRejected(503, 1, 'The court portal is busy, please retry in a moment')
+            self.in_flight += 1
+            self.admitted += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'admitted': self.admitted,
+                'rate_limited': self.rate_limited,
+                'shed': self.shed,
+                'clients': len(self._buckets)
+            }
+
+
+# Global admission controller
+admission_controller = AdmissionController()
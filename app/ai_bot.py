@@ -1,8 +1,10 @@
 import os
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import date
+from typing import Dict, List, Optional, Union
+from .records import CaseRecord, DateValue, format_date
+from .intents import IntentMatcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -61,19 +63,17 @@ class CourtAIBot:
             }
         }
     
-    def analyze_case(self, case_data: Dict) -> Dict:
+    def analyze_case(self, case_data: Union[CaseRecord, Dict]) -> Dict:
         """Analyze case data and provide AI insights"""
         try:
-            case_type = case_data.get('case_title', '').split()[0]
-            case_info = self.case_type_info.get(case_type, {})
+            case_data = CaseRecord.coerce(case_data)
+            case_info = self.case_type_info.get(case_data.case_type, {})
             
             # Calculate case age
-            filing_date = case_data.get('filing_date', '')
-            case_age = self._calculate_case_age(filing_date)
+            case_age = self._calculate_case_age(case_data.filing_date)
             
             # Analyze next hearing
-            next_hearing = case_data.get('next_hearing', '')
-            hearing_analysis = self._analyze_hearing_schedule(next_hearing)
+            hearing_analysis = self._analyze_hearing_schedule(case_data.next_hearing)
             
             # Generate insights
             insights = self._generate_insights(case_data, case_info, case_age)
@@ -96,13 +96,11 @@ class CourtAIBot:
             logger.error(f"Error analyzing case: {e}")
             return {'error': 'Unable to analyze case at this time'}
     
-    def _calculate_case_age(self, filing_date: str) -> Dict:
+    def _calculate_case_age(self, filing_date: DateValue) -> Dict:
         """Calculate case age and timeline analysis"""
         try:
-            if filing_date and filing_date != 'Information not available':
-                filing_dt = datetime.strptime(filing_date, '%Y-%m-%d')
-                current_dt = datetime.now()
-                age_days = (current_dt - filing_dt).days
+            if isinstance(filing_date, date):
+                age_days = (date.today() - filing_date).days
                 age_years = age_days / 365.25
                 
                 if age_years < 1:
@@ -124,13 +122,15 @@ class CourtAIBot:
                     'status': status,
                     'description': description
                 }
-            else:
+            elif filing_date is None:
                 return {
                     'age_days': 'Unknown',
                     'age_years': 'Unknown',
                     'status': 'Unknown',
                     'description': 'Filing date not available'
                 }
+            else:
+                raise ValueError(f"Unrecognised filing date: {filing_date}")
         except Exception as e:
             logger.error(f"Error calculating case age: {e}")
             return {
@@ -140,13 +140,11 @@ class CourtAIBot:
                 'description': 'Unable to calculate case age'
             }
     
-    def _analyze_hearing_schedule(self, next_hearing: str) -> Dict:
+    def _analyze_hearing_schedule(self, next_hearing: DateValue) -> Dict:
         """Analyze next hearing schedule"""
         try:
-            if next_hearing and next_hearing != 'Information not available':
-                hearing_dt = datetime.strptime(next_hearing, '%Y-%m-%d')
-                current_dt = datetime.now()
-                days_until_hearing = (hearing_dt - current_dt).days
+            if isinstance(next_hearing, date):
+                days_until_hearing = (next_hearing - date.today()).days
                 
                 if days_until_hearing < 0:
                     status = "Overdue"
@@ -171,13 +169,15 @@ class CourtAIBot:
                     'urgency': urgency,
                     'description': description
                 }
-            else:
+            elif next_hearing is None:
                 return {
                     'days_until_hearing': 'Unknown',
                     'status': 'Unknown',
                     'urgency': 'Unknown',
                     'description': 'Next hearing not scheduled'
                 }
+            else:
+                raise ValueError(f"Unrecognised hearing date: {next_hearing}")
         except Exception as e:
             logger.error(f"Error analyzing hearing schedule: {e}")
             return {
@@ -187,7 +187,7 @@ class CourtAIBot:
                 'description': 'Unable to analyze hearing schedule'
             }
     
-    def _generate_insights(self, case_data: Dict, case_info: Dict, case_age: Dict) -> List[str]:
+    def _generate_insights(self, case_data: CaseRecord, case_info: Dict, case_age: Dict) -> List[str]:
         """Generate AI insights about the case"""
         insights = []
         
@@ -204,16 +204,16 @@ class CourtAIBot:
                 insights.append(f"Case age: {case_age['age_years']} years")
         
         # Hearing insights
-        if case_data.get('next_hearing'):
-            insights.append(f"Next hearing: {case_data['next_hearing']}")
+        if case_data.next_hearing:
+            insights.append(f"Next hearing: {format_date(case_data.next_hearing)}")
         
         # Parties analysis
-        parties = case_data.get('parties', '')
+        parties = case_data.parties or ''
         if 'vs.' in parties or 'v.' in parties:
             insights.append("This appears to be an adversarial proceeding")
         
         # Legal insights based on case type
-        case_type = case_data.get('case_title', '').split()[0]
+        case_type = case_data.case_type
         if case_type == 'WP(C)':
             insights.append("Fundamental rights violation alleged")
             insights.append("Constitutional remedy sought")
@@ -229,7 +229,7 @@ class CourtAIBot:
         
         return insights
     
-    def _generate_recommendations(self, case_data: Dict, case_info: Dict, case_age: Dict) -> List[str]:
+    def _generate_recommendations(self, case_data: CaseRecord, case_info: Dict, case_age: Dict) -> List[str]:
         """Generate AI recommendations"""
         recommendations = []
         
@@ -238,7 +238,7 @@ class CourtAIBot:
         recommendations.append("Review all case documents thoroughly")
         
         # Case-specific recommendations
-        case_type = case_data.get('case_title', '').split()[0]
+        case_type = case_data.case_type
         if case_type == 'WP(C)':
             recommendations.append("Focus on fundamental rights violation")
             recommendations.append("Prepare strong constitutional arguments")
@@ -253,8 +253,8 @@ class CourtAIBot:
             recommendations.append("Focus on interim relief arguments")
         
         # Age-based recommendations
-        if case_age.get('age_years') != 'Unknown':
-            age = case_age['age_years']
+        age = case_age.get('age_years')
+        if isinstance(age, (int, float)):
             if age > 5:
                 recommendations.append("Consider case status review")
                 recommendations.append("Check for any procedural delays")
@@ -264,15 +264,15 @@ class CourtAIBot:
         
         return recommendations
     
-    def _generate_ai_summary(self, case_data: Dict, insights: List[str], recommendations: List[str]) -> str:
+    def _generate_ai_summary(self, case_data: CaseRecord, insights: List[str], recommendations: List[str]) -> str:
         """Generate a comprehensive AI summary"""
         summary = f"🤖 **AI Case Analysis Summary**\n\n"
         
         summary += f"**Case Overview:**\n"
-        summary += f"• {case_data.get('case_title', 'Unknown case')}\n"
-        summary += f"• Parties: {case_data.get('parties', 'Unknown')}\n"
-        summary += f"• Filed: {case_data.get('filing_date', 'Unknown')}\n"
-        summary += f"• Next Hearing: {case_data.get('next_hearing', 'Not scheduled')}\n\n"
+        summary += f"• {case_data.case_title or 'Unknown case'}\n"
+        summary += f"• Parties: {case_data.parties or 'Unknown'}\n"
+        summary += f"• Filed: {format_date(case_data.filing_date) if case_data.filing_date else 'Unknown'}\n"
+        summary += f"• Next Hearing: {format_date(case_data.next_hearing) if case_data.next_hearing else 'Not scheduled'}\n\n"
         
         summary += f"**Key Insights:**\n"
         for insight in insights[:5]:  # Limit to top 5 insights
@@ -286,32 +286,59 @@ class CourtAIBot:
         
         return summary
     
-    def answer_question(self, question: str, case_data: Dict) -> str:
+    def build_context(self, case_data: Union[CaseRecord, Dict]) -> Dict:
+        """Per-case values shared by every question about that case"""
+        case_data = CaseRecord.coerce(case_data)
+        case_info = self.case_type_info.get(case_data.case_type, {})
+        case_age = self._calculate_case_age(case_data.filing_date)
+        return {
+            'case': case_data,
+            'case_age': case_age,
+            'recommendations': self._generate_recommendations(case_data, case_info, case_age)
+        }
+    
+    def answer_question(self, question: str, case_data: Union[CaseRecord, Dict],
+                        context: Optional[Dict] = None) -> str:
         """Answer specific questions about the case"""
-        question_lower = question.lower()
-        
-        if 'what' in question_lower and 'case' in question_lower:
-            return f"This is a {case_data.get('case_title', 'court case')} involving {case_data.get('parties', 'the parties')}."
-        
-        elif 'when' in question_lower and 'filed' in question_lower:
-            return f"The case was filed on {case_data.get('filing_date', 'an unknown date')}."
-        
-        elif 'next' in question_lower and 'hearing' in question_lower:
-            return f"The next hearing is scheduled for {case_data.get('next_hearing', 'an unknown date')}."
-        
-        elif 'how' in question_lower and 'long' in question_lower:
-            case_age = self._calculate_case_age(case_data.get('filing_date', ''))
-            if case_age.get('age_years') != 'Unknown':
-                return f"The case has been ongoing for {case_age['age_years']} years ({case_age['status']})."
-            else:
-                return "The case duration is unknown due to missing filing date."
-        
-        elif 'advice' in question_lower or 'recommend' in question_lower:
-            recommendations = self._generate_recommendations(case_data, {}, {})
-            return f"Based on the case details, I recommend: {'; '.join(recommendations[:3])}"
-        
+        context = context or self.build_context(case_data)
+        intent = QUESTION_INTENTS.match(question)
+        handler = getattr(self, f"_answer_{intent}") if intent else self._answer_fallback
+        return handler(context)
+    
+    def _answer_case_overview(self, context: Dict) -> str:
+        case_data = context['case']
+        return f"This is a {case_data.case_title or 'court case'} involving {case_data.parties or 'the parties'}."
+    
+    def _answer_filing_date(self, context: Dict) -> str:
+        case_data = context['case']
+        return f"The case was filed on {format_date(case_data.filing_date) if case_data.filing_date else 'an unknown date'}."
+    
+    def _answer_next_hearing(self, context: Dict) -> str:
+        case_data = context['case']
+        return f"The next hearing is scheduled for {format_date(case_data.next_hearing) if case_data.next_hearing else 'an unknown date'}."
+    
+    def _answer_duration(self, context: Dict) -> str:
+        case_age = context['case_age']
+        if case_age.get('age_years') != 'Unknown':
+            return f"The case has been ongoing for {case_age['age_years']} years ({case_age['status']})."
         else:
-            return "I can help you with questions about case details, timeline, legal implications, and recommendations. Please ask a specific question about the case."
+            return "The case duration is unknown due to missing filing date."
+    
+    def _answer_recommendations(self, context: Dict) -> str:
+        return f"Based on the case details, I recommend: {'; '.join(context['recommendations'][:3])}"
+    
+    def _answer_fallback(self, context: Dict) -> str:
+        return "I can help you with questions about case details, timeline, legal implications, and recommendations. Please ask a specific question about the case."
+
+# Intents in precedence order; each keyword group must match somewhere in
+# the question (substring match, as the old `'x' in question` checks did)
+QUESTION_INTENTS = IntentMatcher([
+    ('case_overview', [['what'], ['case']]),
+    ('filing_date', [['when'], ['filed']]),
+    ('next_hearing', [['next'], ['hearing']]),
+    ('duration', [['how'], ['long']]),
+    ('recommendations', [['advice', 'recommend']])
+])
 
 # Global AI bot instance
 ai_bot = CourtAIBot() 
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Fingerprinted, precompressed static assets
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+
+from flask import Blueprint, abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Precompressed variants in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(path):
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()[:12]
+
+
+def hashed_name(relpath, digest):
+    root, ext = os.path.splitext(relpath)
+    return f"{root}.{digest}{ext}"
+
+
+def build_assets(static_dir, output_dir, level=9):
+    """
+    Copy every file under static_dir to output_dir with a content hash in
+    its name, write .gz (and .br with brotli installed) siblings for text
+    assets where that saves bytes, and write a manifest of
+    original -> hashed paths. Returns the manifest.
+    """
+    manifest = {}
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            target_rel = hashed_name(relpath, fingerprint(source))
+            target = os.path.join(output_dir, target_rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            manifest[relpath] = target_rel
+
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with open(source, 'rb') as fh:
+                data = fh.read()
+            variants = {'.gz': gzip.compress(data, compresslevel=level, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(data):
+                    with open(target + suffix, 'wb') as fh:
+                        fh.write(compressed)
+
+    with open(os.path.join(output_dir, MANIFEST), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticAssets:
+    """
+    Resolves static paths to fingerprinted URLs and serves the built files.
+
+    Without a build (`flask build-static`) asset_url() falls back to the
+    plain /static URL, so development needs no extra step.
+    """
+
+    def __init__(self):
+        self.build_dir = None
+        self.manifest = {}
+
+    def init_app(self, app):
+        self.build_dir = app.config.get('STATIC_BUILD_DIR') or os.path.join(app.instance_path, 'static_build')
+        self.load_manifest()
+        app.register_blueprint(assets)
+        app.add_template_global(asset_url)
+
+    def load_manifest(self):
+        path = os.path.join(self.build_dir, MANIFEST)
+        try:
+            with open(path, encoding='utf-8') as fh:
+                self.manifest = json.load(fh)
+        except FileNotFoundError:
+            self.manifest = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+            self.manifest = {}
+
+    def build(self, static_dir, level=9):
+        if os.path.isdir(self.build_dir):
+            shutil.rmtree(self.build_dir)
+        os.makedirs(self.build_dir)
+        self.manifest = build_assets(static_dir, self.build_dir, level)
+        return self.manifest
+
+    def url(self, path):
+        hashed = self.manifest.get(path)
+        if hashed:
+            return url_for('assets.serve_asset', filename=hashed)
+        return url_for('static', filename=path)
+
+
+assets = Blueprint('assets', __name__, url_prefix='/assets')
+
+
+@assets.route('/<path:filename>')
+def serve_asset(filename):
+    """Serve a fingerprinted asset, precompressed when the client accepts it"""
+    if filename == MANIFEST:
+        abort(404)
+    build_dir = static_assets.build_dir
+    path = os.path.realpath(os.path.join(build_dir, filename))
+    if not path.startswith(os.path.realpath(build_dir) + os.sep) or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+def asset_url(path):
+    """Template helper: fingerprinted URL for a file under static/"""
+    return static_assets.url(path)
+
+
+# Global asset registry
+static_assets = StaticAssets()
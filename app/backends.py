@@ -0,0 +1,272 @@
+"""
+Court backends and a registry that fans case searches out across them
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .profiler import follow
+from .records import CaseRecord, NOT_AVAILABLE
+from .scraper import (DelhiHighCourtScraper, scraper, get_demo_case_data, is_transient_error,
+                      DEMO_CASES, VALID_CASE_TYPES, UPSTREAM_RATE, UPSTREAM_BURST)
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = "No case found with the provided details"
+DEFAULT_TIMEOUT = 60.0
+
+
+class CourtBackend:
+    """
+    A source of case details.
+
+    Subclasses set `name` and `case_types` (None means every type) and
+    implement lookup(), returning (CaseRecord, None) when found, (None, None)
+    when the case is simply not in this source, or (None, error). Results
+    from an `authoritative` backend end a fan-out search at once; the others
+    are merged. `network` backends are skipped for offline lookups.
+    """
+
+    name = 'backend'
+    case_types: Optional[frozenset] = None
+    authoritative = True
+    network = True
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.found = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+
+    def supports(self, case_type: str) -> bool:
+        return self.case_types is None or case_type in self.case_types
+
+    def lookup(self, case_type: str, case_number: str, filing_year: str) -> Tuple[Optional[CaseRecord], Optional[str]]:
+        raise NotImplementedError
+
+    def search(self, case_type, case_number, filing_year):
+        """lookup() with counters; never raises"""
+        started = time.perf_counter()
+        try:
+            result, error = self.lookup(case_type, case_number, filing_year)
+        except Exception as e:
+            logger.error(f"Backend {self.name} failed: {e}")
+            result, error = None, f"Unexpected error: {e}"
+        with self._lock:
+            self.calls += 1
+            self.found += result is not None
+            self.errors += error is not None
+            self.total_seconds += time.perf_counter() - started
+        return result, error
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'case_types': sorted(self.case_types) if self.case_types is not None else None,
+                'authoritative': self.authoritative,
+                'network': self.network,
+                'timeout': self.timeout,
+                'calls': self.calls,
+                'found': self.found,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'avg_ms': round(self.total_seconds / self.calls * 1000, 1) if self.calls else None
+            }
+
+
+class DemoBackend(CourtBackend):
+    """The built-in demo cases; needs no network"""
+
+    name = 'demo'
+    network = False
+
+    def __init__(self, cases=DEMO_CASES, timeout: float = 1.0):
+        super().__init__(timeout)
+        self.case_types = frozenset(case_type for case_type, _, _ in cases)
+
+    def lookup(self, case_type, case_number, filing_year):
+        return get_demo_case_data(case_type, case_number, filing_year), None
+
+
+class AspNetCourtBackend(CourtBackend):
+    """A court portal searched with the ASP.NET viewstate/POST flow of DelhiHighCourtScraper"""
+
+    def __init__(self, name: str, court_scraper: DelhiHighCourtScraper, case_types: Optional[Iterable[str]] = None,
+                 timeout: float = DEFAULT_TIMEOUT, authoritative: bool = True):
+        super().__init__(timeout)
+        self.name = name
+        self.scraper = court_scraper
+        self.case_types = frozenset(case_types) if case_types is not None else None
+        self.authoritative = authoritative
+
+    def lookup(self, case_type, case_number, filing_year):
+        return self.scraper.search_case(case_type, case_number, filing_year)
+
+
+def merge_records(records: List[CaseRecord]) -> CaseRecord:
+    """Combine partial records; earlier records win for fields they have"""
+    merged = {}
+    for record in records:
+        for field, value in record.to_dict().items():
+            if merged.get(field) in (None, NOT_AVAILABLE, '') and value not in (None, NOT_AVAILABLE, ''):
+                merged[field] = value
+            merged.setdefault(field, value)
+    return CaseRecord.from_dict(merged)
+
+
+class BackendRegistry:
+    """
+    Ordered set of court backends.
+
+    A search first asks the offline backends (the demo table) in order, then
+    runs every eligible network backend concurrently. The first found result
+    from an authoritative backend wins; otherwise found results are merged
+    in registry order once all backends answer or time out. A backend's
+    timeout runs from when its call starts on the pool, not while it waits
+    for a thread; a call that exceeds it is abandoned, not interrupted.
+    Calls nobody is waiting for any more are cancelled if not yet started.
+    """
+
+    def __init__(self):
+        self.backends: List[CourtBackend] = []
+        self.max_workers = 16
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        timeout = app.config.get('BACKEND_TIMEOUT', DEFAULT_TIMEOUT)
+        self.max_workers = app.config.get('BACKEND_MAX_WORKERS', 16)
+        self.backends = [
+            DemoBackend(),
+            AspNetCourtBackend('delhi_high_court', scraper, VALID_CASE_TYPES, timeout=timeout)
+        ]
+        for spec in app.config.get('ASPNET_BACKENDS') or []:
+            self.register(self.aspnet_backend(spec, app, timeout))
+
+    @staticmethod
+    def aspnet_backend(spec: Dict, app, default_timeout: float) -> AspNetCourtBackend:
+        """Build a backend from a config dict: name, search_url, base_url, case_types, timeout, authoritative"""
+        court_scraper = DelhiHighCourtScraper(base_url=spec.get('base_url'), search_url=spec['search_url'])
+        court_scraper.init_app(app)
+        # Each portal gets its own politeness budget
+        court_scraper.rate_limiter = shared_state.make_bucket(f"upstream:{spec['name']}", rate=UPSTREAM_RATE,
+                                                              capacity=UPSTREAM_BURST)
+        return AspNetCourtBackend(spec['name'], court_scraper, spec.get('case_types'),
+                                  timeout=spec.get('timeout', default_timeout),
+                                  authoritative=spec.get('authoritative', True))
+
+    def register(self, backend: CourtBackend):
+        self.backends = [b for b in self.backends if b.name != backend.name] + [backend]
+
+    def case_types(self) -> frozenset:
+        types = set()
+        for backend in self.backends:
+            if backend.case_types is None:
+                return None
+            types |= backend.case_types
+        return frozenset(types)
+
+    def eligible(self, case_type: str, network: Optional[bool] = None) -> List[CourtBackend]:
+        return [b for b in self.backends
+                if b.supports(case_type) and (network is None or b.network == network)]
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='backend')
+            return self._executor
+
+    def search_offline(self, case_type, case_number, filing_year):
+        """Look a case up in the offline backends only; (None, None) if none has it"""
+        for backend in self.eligible(case_type, network=False):
+            result, error = backend.search(case_type, case_number, filing_year)
+            if result is not None:
+                return result, None
+        return None, None
+
+    def search(self, case_type, case_number, filing_year):
+        """Return (result, error) from the offline, then the network backends"""
+        result, _ = self.search_offline(case_type, case_number, filing_year)
+        if result is not None:
+            return result, None
+        return self.search_network(case_type, case_number, filing_year)
+
+    def search_network(self, case_type, case_number, filing_year):
+        """Return (result, error) from the eligible network backends, searched concurrently"""
+        backends = self.eligible(case_type, network=True)
+        if not backends:
+            return None, f"No court backend supports case type {case_type}"
+
+        # Completed with the start time once a backend's call leaves the queue
+        starts = {backend.name: Future() for backend in backends}
+
+        def run(backend):
+            starts[backend.name].set_result(time.monotonic())
+            return backend.search(case_type, case_number, filing_year)
+
+        futures = {self.executor.submit(follow(run), backend): backend for backend in backends}
+        outcomes = {}
+        pending = set(futures)
+
+        def deadline(future):
+            backend = futures[future]
+            start = starts[backend.name]
+            return start.result() + backend.timeout if start.done() else None
+
+        try:
+            while pending:
+                deadlines = [d for d in map(deadline, pending) if d is not None]
+                queued = {starts[futures[f].name] for f in pending if not starts[futures[f].name].done()}
+                done, _ = wait(pending | queued,
+                               timeout=max(0.0, min(deadlines) - time.monotonic()) if deadlines else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done & pending:
+                    pending.discard(future)
+                    backend = futures[future]
+                    result, error = outcomes[backend.name] = future.result()
+                    if result is not None and backend.authoritative:
+                        return result, None
+                now = time.monotonic()
+                for future in [f for f in pending if deadline(f) is not None and now >= deadline(f)]:
+                    backend = futures[future]
+                    future.cancel()
+                    backend.record_timeout()
+                    logger.warning(f"Backend {backend.name} timed out after {backend.timeout}s")
+                    outcomes[backend.name] = (None, f"Network error: {backend.name} timed out")
+                    pending.discard(future)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return self._combine([outcomes[b.name] for b in backends])
+
+    @staticmethod
+    def _combine(outcomes) -> Tuple[Optional[CaseRecord], Optional[str]]:
+        found = [result for result, _ in outcomes if result is not None]
+        if found:
+            return (found[0] if len(found) == 1 else merge_records(found)), None
+        errors = [error for _, error in outcomes if error]
+        # A failed backend might have had the case, so prefer errors worth retrying
+        transient = [error for error in errors if is_transient_error(error)]
+        if transient:
+            return None, transient[0]
+        return None, errors[0] if errors else NOT_FOUND
+
+    def stats(self) -> Dict:
+        return {backend.name: backend.stats() for backend in self.backends}
+
+
+# Global backend registry
+backend_registry = BackendRegistry()
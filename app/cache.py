@@ -0,0 +1,142 @@
+"""
+In-process caches for case lookups
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a TTL.
+
+    Expired entries are kept for `stale_ttl` more seconds so callers that
+    prefer an old answer over no answer can still read them with get_stale().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, stale_ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable, allow_stale: bool):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            expires_at, value = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._data[key]
+                self.misses += 1
+                return _MISSING
+            if now >= expires_at and not allow_stale:
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh value for key, or default"""
+        value = self._lookup(key, allow_stale=False)
+        return default if value is _MISSING else value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Return a value for key even if it expired within the stale window"""
+        value = self._lookup(key, allow_stale=True)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CaseLookupCache:
+    """
+    Remembers the outcome of upstream case lookups.
+
+    Found cases, definitive negative answers ("No case details found", portal
+    error divs) and transient failures (network errors) each get their own
+    TTL, so a bad case number is not re-scraped on every retry while a
+    flaky network is retried soon.
+    """
+
+    def __init__(self, result_ttl: float = 3600, negative_ttl: float = 600,
+                 transient_ttl: float = 30, maxsize: int = 4096):
+        self.result_ttl = result_ttl
+        self.negative_ttl = negative_ttl
+        self.transient_ttl = transient_ttl
+        self.maxsize = maxsize
+        self.results = TTLCache(maxsize=maxsize, ttl=result_ttl, stale_ttl=result_ttl)
+        self.failures = TTLCache(maxsize=maxsize, ttl=negative_ttl)
+
+    def configure(self, make_cache):
+        """Rebuild the caches with a factory such as SharedState.make_cache"""
+        self.results = make_cache('case_results', maxsize=self.maxsize, ttl=self.result_ttl,
+                                  stale_ttl=self.result_ttl)
+        self.failures = make_cache('case_failures', maxsize=self.maxsize, ttl=self.negative_ttl)
+
+    @staticmethod
+    def make_key(case_type: str, case_number: str, filing_year: str) -> Tuple[str, str, str]:
+        return (case_type.strip().upper(), case_number.strip().lstrip('0') or '0', filing_year.strip())
+
+    def get(self, key) -> Optional[Tuple[Any, Optional[str]]]:
+        """Return a cached (result, error) pair, or None on a miss"""
+        result = self.results.get(key)
+        if result is not None:
+            return result, None
+        error = self.failures.get(key)
+        if error is not None:
+            return None, error
+        return None
+
+    def get_stale(self, key) -> Any:
+        """Return a possibly expired result for key, or None"""
+        return self.results.get_stale(key)
+
+    def store(self, key, result: Any, error: Optional[str], transient: bool = False):
+        if result is not None:
+            self.results.set(key, result)
+            self.failures.pop(key)
+        elif error:
+            self.failures.set(key, error, ttl=self.transient_ttl if transient else self.negative_ttl)
+
+    def clear(self):
+        self.results.clear()
+        self.failures.clear()
+
+    def stats(self) -> dict:
+        return {
+            'results': len(self.results),
+            'failures': len(self.failures),
+            'result_hits': self.results.hits,
+            'failure_hits': self.failures.hits
+        }
@@ -0,0 +1,82 @@
+"""
+Flask CLI commands (run with `flask --app run <command>`)
+"""
+
+import click
+from flask import current_app
+
+@click.command('rollup-logs')
+@click.option('--retention-days', type=int, default=None,
+              help='Keep raw QueryLog rows this many days (default: QUERYLOG_RETENTION_DAYS)')
+@click.option('--archive-dir', default=None,
+              help='Archive pruned rows here as gzipped JSONL (default: QUERYLOG_ARCHIVE_DIR)')
+def rollup_logs_command(retention_days, archive_dir):
+    """Roll old QueryLog rows into daily aggregates and prune them"""
+    from .retention import rollup_query_logs
+
+    if retention_days is None:
+        retention_days = current_app.config['QUERYLOG_RETENTION_DAYS']
+    if archive_dir is None:
+        archive_dir = current_app.config['QUERYLOG_ARCHIVE_DIR']
+
+    summary = rollup_query_logs(retention_days=retention_days, archive_dir=archive_dir)
+    click.echo(f"✅ Rolled up {summary['rows']} rows across {summary['days']} days "
+               f"(older than {summary['cutoff']})")
+
+@click.command('ingest')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', 'output_path', required=True, type=click.Path(dir_okay=False),
+              help='JSONL file results are appended to')
+@click.option('--concurrency', type=int, default=4, show_default=True, help='Parallel lookups')
+@click.option('--rate', type=float, default=2.0, show_default=True, help='Lookups started per second')
+@click.option('--checkpoint', 'checkpoint_path', default=None, type=click.Path(dir_okay=False),
+              help='Progress file for resuming (default: <output>.checkpoint)')
+@click.option('--no-db', is_flag=True, help='Do not write QueryLog rows')
+def ingest_command(input_path, output_path, concurrency, rate, checkpoint_path, no_db):
+    """Look up every case in a CSV/JSONL of case_type, case_number, filing_year"""
+    from .ingest import ingest_cases
+
+    click.echo(f"📥 Ingesting {input_path} -> {output_path}")
+    summary = ingest_cases(input_path, output_path, concurrency=concurrency, rate=rate,
+                           checkpoint_path=checkpoint_path, write_db=not no_db)
+    click.echo(f"✅ Processed {summary['processed']} cases ({summary['failed']} failed, "
+               f"{summary['skipped']} already done)")
+
+@click.command('build-static')
+@click.option('--level', type=int, default=9, show_default=True, help='gzip compression level')
+def build_static_command(level):
+    """Fingerprint and precompress files under static/ for /assets serving"""
+    from .assets import static_assets, brotli
+
+    manifest = static_assets.build(current_app.static_folder, level=level)
+    encodings = 'gzip and brotli' if brotli is not None else 'gzip (install brotli for .br)'
+    click.echo(f"✅ Built {len(manifest)} assets into {static_assets.build_dir} ({encodings})")
+
+@click.command('export')
+@click.argument('dataset', type=click.Choice(['history', 'cases']))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'parquet']), default='csv', show_default=True)
+@click.option('--output', 'output_path', default='-', type=click.Path(dir_okay=False, allow_dash=True),
+              help='File to write (default: stdout)')
+@click.option('--since', default=None, help='Only rows at or after this ISO date/datetime')
+@click.option('--until', default=None, help='Only rows before this ISO datetime (a date includes that day)')
+@click.option('--case-type', default=None, help='Comma-separated case types')
+@click.option('--status', default=None, help='Comma-separated statuses (history only)')
+def export_command(dataset, fmt, output_path, since, until, case_type, status):
+    """Stream QueryLog history or found cases to CSV, JSONL or Parquet"""
+    from .export import export_filters, export_stream
+
+    try:
+        chunks = export_stream(dataset, fmt, export_filters(since, until, case_type, status))
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    with click.open_file(output_path, 'wb') as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+    if output_path != '-':
+        click.echo(f"✅ Exported {dataset} to {output_path}")
+
+def register_commands(app):
+    app.cli.add_command(rollup_logs_command)
+    app.cli.add_command(ingest_command)
+    app.cli.add_command(build_static_command)
+    app.cli.add_command(export_command)
@@ -0,0 +1,79 @@
+"""
+Server-side case contexts for follow-up questions
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, Optional, Tuple, Union
+
+from .ai_bot import ai_bot
+from .cache import TTLCache
+from .records import CaseRecord
+from .shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class ContextStore:
+    """
+    Bounded, TTL-evicted store of per-case question contexts.
+
+    A context holds the case and the values derived from it (age,
+    recommendations), so follow-up questions send only a context id instead
+    of the whole case and skip re-deriving them. Ids are content hashes, so
+    registering the same case twice yields the same id. Each read extends
+    the context's lifetime.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 1800):
+        self._contexts = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.created = 0
+
+    def init_app(self, app):
+        self._contexts = shared_state.make_cache('contexts', maxsize=app.config.get('CONTEXT_MAXSIZE', 2048),
+                                                 ttl=app.config.get('CONTEXT_TTL', 1800))
+        self.created = 0
+
+    @staticmethod
+    def make_id(case: CaseRecord) -> str:
+        canonical = json.dumps(case.to_dict(), sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:24]
+
+    def register(self, case_data: Union[CaseRecord, Dict]) -> Tuple[str, Dict]:
+        """Return (context_id, context) for a case, building the context if needed"""
+        case = CaseRecord.coerce(case_data)
+        context_id = self.make_id(case)
+        context = self._contexts.get(context_id)
+        if context is None:
+            context = ai_bot.build_context(case)
+            self.created += 1
+        self._contexts.set(context_id, context)
+        return context_id, context
+
+    def register_lookup(self, case_type: str, case_number: str, filing_year: str) -> Optional[Tuple[str, Dict]]:
+        """Register a case from demo data or the lookup cache; None if it is not cached"""
+        from .scraper import cached_case_details
+
+        cached = cached_case_details(case_type, case_number, filing_year, allow_stale=True)
+        if not cached or not cached[0]:
+            return None
+        return self.register(cached[0])
+
+    def get(self, context_id: str) -> Optional[Dict]:
+        context = self._contexts.get(context_id)
+        if context is not None:
+            self._contexts.set(context_id, context)
+        return context
+
+    def stats(self) -> Dict:
+        return {
+            'contexts': len(self._contexts),
+            'created': self.created,
+            'hits': self._contexts.hits,
+            'misses': self._contexts.misses
+        }
+
+
+# Global context store
+case_contexts = ContextStore()
@@ -0,0 +1,233 @@
+"""
+Streaming export of search history and case data
+"""
+
+import csv
+import io
+import logging
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterator, Optional
+
+from . import db
+from .models import QueryLog
+from .serializers import dumps, loads
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FIELDS = ('id', 'timestamp', 'case_type', 'case_number', 'filing_year', 'status', 'duration_ms')
+CASE_FIELDS = ('id', 'timestamp', 'case_type', 'case_number', 'filing_year', 'case_title', 'parties',
+               'filing_date', 'next_hearing', 'latest_order_date', 'latest_order_pdf_url')
+DATASETS = {'history': HISTORY_FIELDS, 'cases': CASE_FIELDS}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+CHUNK_ROWS = 2000
+FLUSH_BYTES = 64 * 1024
+
+
+def parse_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    """ISO date or datetime; a bare `until` date includes that whole day"""
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            return datetime.combine(day + timedelta(days=1) if end else day, dt_time.min)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+
+
+def export_filters(since=None, until=None, case_type=None, status=None) -> Dict:
+    """Validated filters from request/CLI strings; raises ValueError"""
+    return {
+        'since': parse_bound(since),
+        'until': parse_bound(until, end=True),
+        'case_types': [t.strip() for t in case_type.split(',') if t.strip()] if case_type else None,
+        'statuses': [s.strip() for s in status.split(',') if s.strip()] if status else None
+    }
+
+
+def _query(dataset: str, filters: Dict):
+    columns = [QueryLog.id, QueryLog.timestamp, QueryLog.case_type, QueryLog.case_number,
+               QueryLog.filing_year, QueryLog.status, QueryLog.duration_ms]
+    if dataset == 'cases':
+        columns.append(QueryLog.raw_response)
+    query = db.session.query(*columns)
+    if dataset == 'cases':
+        query = query.filter(QueryLog.status == 'success')
+    elif filters.get('statuses'):
+        query = query.filter(QueryLog.status.in_(filters['statuses']))
+    if filters.get('since'):
+        query = query.filter(QueryLog.timestamp >= filters['since'])
+    if filters.get('until'):
+        query = query.filter(QueryLog.timestamp < filters['until'])
+    if filters.get('case_types'):
+        query = query.filter(QueryLog.case_type.in_(filters['case_types']))
+    return query
+
+
+def _case_row(row) -> Optional[Dict]:
+    try:
+        result = (loads(row.raw_response) or {}).get('result') or {}
+    except ValueError:
+        return None
+    order = result.get('latest_order') or {}
+    return {
+        'id': row.id,
+        'timestamp': row.timestamp,
+        'case_type': row.case_type,
+        'case_number': row.case_number,
+        'filing_year': row.filing_year,
+        'case_title': result.get('case_title'),
+        'parties': result.get('parties'),
+        'filing_date': result.get('filing_date'),
+        'next_hearing': result.get('next_hearing'),
+        'latest_order_date': order.get('date'),
+        'latest_order_pdf_url': order.get('pdf_url')
+    }
+
+
+def iter_rows(dataset: str, filters: Dict, chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict]:
+    """
+    Yield export rows in id order, chunk_rows at a time.
+
+    Each chunk is a keyset query (id > last id) in its own short
+    transaction streamed with yield_per, so memory stays flat and no
+    read lock is held across the whole export: on SQLite a long-lived
+    reader would block QueryLog writes from searches running meanwhile.
+    """
+    last_id = 0
+    while True:
+        chunk = (_query(dataset, filters)
+                 .filter(QueryLog.id > last_id)
+                 .order_by(QueryLog.id)
+                 .limit(chunk_rows)
+                 .execution_options(yield_per=500, stream_results=True))
+        count = 0
+        try:
+            for row in chunk:
+                count += 1
+                last_id = row.id
+                if dataset == 'cases':
+                    record = _case_row(row)
+                    if record is not None:
+                        yield record
+                else:
+                    yield {field: getattr(row, field) for field in HISTORY_FIELDS}
+        finally:
+            db.session.rollback()
+        if count < chunk_rows:
+            return
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def iter_csv(rows: Iterator[Dict], fields) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_cell(row.get(field)) for field in fields])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_jsonl(rows: Iterator[Dict], fields) -> Iterator[bytes]:
+    buffer = []
+    size = 0
+    for row in rows:
+        line = dumps({key: _cell(row.get(key)) for key in fields}) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    yield ''.join(buffer).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream whose bytes are drained after each Parquet row group"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(rows: Iterator[Dict], fields, group_rows: int = CHUNK_ROWS * 5) -> Iterator[bytes]:
+    """One Parquet row group per group_rows rows; needs the optional pyarrow package"""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs the optional pyarrow package")
+    schema = pyarrow.schema([
+        (field, pyarrow.int64() if field == 'id' else pyarrow.float64() if field == 'duration_ms'
+         else pyarrow.timestamp('us') if field == 'timestamp' else pyarrow.string())
+        for field in fields
+    ])
+    sink = _ChunkSink()
+    writer = parquet.ParquetWriter(sink, schema, compression='snappy')
+    batch = []
+
+    def write_batch():
+        table = pyarrow.Table.from_pylist(batch, schema=schema)
+        writer.write_table(table)
+        batch.clear()
+
+    for row in rows:
+        batch.append({field: row.get(field) for field in fields})
+        if len(batch) >= group_rows:
+            write_batch()
+            yield sink.drain()
+    if batch:
+        write_batch()
+    writer.close()
+    yield sink.drain()
+
+
+WRITERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'parquet': iter_parquet}
+
+
+def export_stream(dataset: str, fmt: str, filters: Dict) -> Iterator[bytes]:
+    """Encoded chunks of a dataset export; raises ValueError for unknown names"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if dataset == 'cases' and filters.get('statuses'):
+        raise ValueError("The status filter applies to the history dataset only")
+    if fmt == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet export needs the optional pyarrow package")
+    fields = DATASETS[dataset]
+    return (chunk for chunk in WRITERS[fmt](iter_rows(dataset, filters), fields) if chunk)
@@ -0,0 +1,109 @@
+"""
+Fragment caching for templates
+"""
+
+import hashlib
+import json
+import threading
+from collections import defaultdict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from .cache import TTLCache
+
+
+def _key_default(value):
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+class FragmentCache:
+    """
+    Rendered template fragments keyed by a hash of their inputs.
+
+    Templates mark a block with `{% cache 'name', value, ... %}` ...
+    `{% endcache %}`; the block is rendered once per distinct set of values
+    and served from memory afterwards. The values must determine everything
+    the block renders.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._fragments = TTLCache(maxsize=512, ttl=3600)
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', True)
+        self._fragments = TTLCache(maxsize=app.config.get('FRAGMENT_CACHE_SIZE', 512),
+                                   ttl=app.config.get('FRAGMENT_CACHE_TTL', 3600))
+        self.hits.clear()
+        self.misses.clear()
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+
+    @staticmethod
+    def make_key(template, name, values):
+        canonical = json.dumps(values, sort_keys=True, default=_key_default, separators=(',', ':'))
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+        return f"{template}:{name}:{digest}"
+
+    def render(self, template, name, values, caller):
+        if not self.enabled:
+            return caller()
+        key = self.make_key(template, name, values)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = caller()
+            self._fragments.set(key, fragment)
+            with self._lock:
+                self.misses[name] += 1
+        else:
+            with self._lock:
+                self.hits[name] += 1
+        return fragment
+
+    def clear(self):
+        self._fragments.clear()
+
+    def stats(self):
+        with self._lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            return {
+                'enabled': self.enabled,
+                'fragments': len(self._fragments),
+                'by_name': {name: {'hits': self.hits[name], 'misses': self.misses[name]} for name in names}
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja `{% cache name, value, ... %}` tag backed by the environment's FragmentCache"""
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        name = parser.parse_expression()
+        values = []
+        while parser.stream.skip_if('comma'):
+            values.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        args = [nodes.Const(parser.name), name, nodes.List(values)]
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template, name, values, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.render(template, name, values, caller)
+
+
+# Global fragment cache
+fragment_cache = FragmentCache()
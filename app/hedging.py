@@ -0,0 +1,167 @@
+"""
+Hedged upstream lookups: re-issue slow searches on a second session
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+
+from .profiler import follow
+from .utils import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """Check-out pool of HTTP sessions so concurrent lookups never share cookies"""
+
+    def __init__(self, factory, size=4):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.factory()
+
+    def release(self, session):
+        if self._idle.qsize() < self.size:
+            self._idle.put(session)
+        else:
+            session.close()
+
+
+class HedgingPolicy:
+    """
+    Issues a backup lookup when the first one is slower than usual.
+
+    If a search is still running after the adaptive threshold (the observed
+    PERCENTILE of recent attempt latencies, or DEFAULT_DELAY until enough
+    samples exist), counted from when it started rather than when it was
+    queued, the same search is started on a different pooled session and
+    the first successful answer wins. Hedges are capped at
+    BUDGET_RATIO of primary searches plus a small burst. requests cannot
+    abort in-flight I/O, so a losing attempt is cancelled if it has not
+    started and otherwise runs to completion with its answer discarded.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.percentile = 95
+        self.min_samples = 20
+        self.default_delay = 2.0
+        self.budget_ratio = 0.05
+        self.budget_burst = 5
+        self.latency = LatencyTracker()
+        self.pool = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self.primaries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.saved_ms = 0.0
+
+    def configure(self, session_factory, enabled=False, pool_size=4, percentile=95,
+                  min_samples=20, default_delay=2.0, budget_ratio=0.05):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.budget_ratio = budget_ratio
+        self.pool = SessionPool(session_factory, pool_size)
+        if enabled and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix='hedged-search')
+
+    def threshold(self):
+        """Seconds to wait before hedging"""
+        if len(self.latency) < self.min_samples:
+            return self.default_delay
+        return self.latency.percentile(self.percentile)
+
+    def _take_budget(self):
+        with self._lock:
+            if self.hedges >= self.budget_ratio * self.primaries + self.budget_burst:
+                self.budget_denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def _attempt(self, search, args, started_event=None):
+        if started_event is not None:
+            started_event.set()
+        session = self.pool.acquire()
+        started = time.perf_counter()
+        try:
+            return search(session, *args)
+        finally:
+            self.latency.add(time.perf_counter() - started)
+            self.pool.release(session)
+
+    def run(self, search, *args):
+        """
+        Run `search(session, *args)` -> (result, error), hedging if slow.
+        """
+        with self._lock:
+            self.primaries += 1
+
+        # Time from when the attempt starts: waiting for a free executor
+        # thread is local queueing, not upstream slowness
+        started = threading.Event()
+        primary = self._executor.submit(follow(self._attempt), search, args, started)
+        started.wait()
+        try:
+            return primary.result(timeout=self.threshold())
+        except FutureTimeout:
+            pass
+
+        if not self._take_budget():
+            return primary.result()
+
+        logger.info("Search exceeded hedge threshold, issuing backup request")
+        hedge = self._executor.submit(follow(self._attempt), search, args)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+
+        result, error = winner.result()
+        if result is None:
+            # Prefer an answer over a failure from the other attempt
+            other_result, other_error = loser.result()
+            if other_result is not None:
+                winner, loser = loser, winner
+                result, error = other_result, other_error
+
+        if winner is hedge:
+            answered = time.perf_counter()
+            with self._lock:
+                self.hedge_wins += 1
+
+            def record_saving(future):
+                saved = time.perf_counter() - answered
+                with self._lock:
+                    self.saved_ms += saved * 1000
+            primary.add_done_callback(record_saving)
+
+        loser.cancel()
+        return result, error
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'threshold_ms': round(self.threshold() * 1000, 1),
+                'primaries': self.primaries,
+                'hedges': self.hedges,
+                'hedge_rate': round(self.hedges / self.primaries, 3) if self.primaries else None,
+                'hedge_wins': self.hedge_wins,
+                'budget_denied': self.budget_denied,
+                'saved_ms_total': round(self.saved_ms, 1),
+                'p50_ms': round((self.latency.percentile(50) or 0) * 1000, 1),
+                'p95_ms': round((self.latency.percentile(95) or 0) * 1000, 1),
+                'p99_ms': round((self.latency.percentile(99) or 0) * 1000, 1)
+            }
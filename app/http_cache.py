@@ -0,0 +1,133 @@
+"""
+HTTP validators, Cache-Control policies and response compression
+"""
+
+import gzip
+import hashlib
+import json
+from datetime import date
+
+from flask import request, current_app
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Cache-Control per endpoint; anything not listed is left alone
+CACHE_POLICIES = {
+    'main.api_search': 'private, max-age=60, must-revalidate',
+    'main.analyze_case': 'private, max-age=300, must-revalidate',
+    'main.ask_ai': 'private, max-age=300, must-revalidate',
+    'main.ask_ai_batch': 'private, max-age=300, must-revalidate',
+    'main.api_suggest': 'public, max-age=30',
+    'main.api_stats': 'private, max-age=60',
+    'main.api_export': 'private, no-store'
+}
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/msgpack', 'text/html', 'text/css', 'text/plain', 'application/javascript')
+
+
+def content_etag(*parts) -> str:
+    """
+    Strong ETag for a response derived from its inputs.
+
+    AI analysis depends on today's date (case age, days to hearing), so the
+    date is part of the hash.
+    """
+    canonical = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    digest = hashlib.sha256(f"{date.today().isoformat()}|{canonical}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def etag_matches(etag: str) -> bool:
+    """
+    True if the request's If-None-Match covers etag, in any content encoding.
+
+    Honoured for the POST lookup endpoints too: they are reads that only
+    use POST to carry a JSON body.
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == etag or candidate.startswith(f"{etag}-"):
+            return True
+    return False
+
+
+def not_modified(etag: str):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+class ResponseCompressor:
+    """
+    after_request hook adding Cache-Control and gzip/brotli compression.
+
+    Responses smaller than COMPRESS_MIN_SIZE, already encoded, streamed or
+    of a non-text type are left untouched. A compressed response's strong
+    ETag gets an encoding suffix so each representation has its own
+    validator; etag_matches() accepts either form.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 500
+        self.level = 6
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        app.after_request(self.after_request)
+
+    def choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=min(self.level, 11))
+        return gzip.compress(data, compresslevel=self.level)
+
+    def after_request(self, response):
+        policy = CACHE_POLICIES.get(request.endpoint)
+        if policy and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = policy if response.status_code in (200, 304) else 'no-store'
+
+        if not self.enabled or response.status_code != 200 or response.direct_passthrough \
+                or response.is_streamed or 'Content-Encoding' in response.headers \
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
+
+
+# Global compressor instance
+response_compressor = ResponseCompressor()
@@ -0,0 +1,163 @@
+"""
+Resumable bulk ingestion of case lists through fetch_case_details
+"""
+
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from . import db
+from .models import QueryLog
+from .scraper import fetch_case_details
+from .serializers import dumps
+from .utils import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('case_type', 'case_number', 'filing_year')
+
+
+def read_cases(path):
+    """Yield (case_type, case_number, filing_year) from a CSV or JSONL file"""
+    with open(path, newline='', encoding='utf-8') as fh:
+        if path.endswith(('.jsonl', '.ndjson')):
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            rows = csv.DictReader(fh)
+        for row in rows:
+            yield tuple(str(row.get(field) or '').strip() for field in FIELDS)
+
+
+def case_key(case):
+    return '|'.join(case)
+
+
+def load_checkpoint(path):
+    """Keys of cases finished by earlier runs"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as fh:
+        return {line.rstrip('\n') for line in fh if line.strip()}
+
+
+class Progress:
+    """Single-line throughput/ETA reporter on stderr"""
+
+    def __init__(self, total, stream=sys.stderr, interval=1.0):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last = 0.0
+
+    def update(self, ok, force=False):
+        self.done += 1
+        if not ok:
+            self.failed += 1
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self.render(now)
+
+    def render(self, now=None):
+        elapsed = (now or time.monotonic()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        eta = remaining / rate if rate else float('inf')
+        eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta != float('inf') else '--:--:--'
+        self.stream.write(f"\r   {self.done}/{self.total} done, {self.failed} failed, "
+                          f"{rate:.2f} cases/s, ETA {eta_text}   ")
+        self.stream.flush()
+
+
+def ingest_cases(input_path, output_path, concurrency=4, rate=2.0, checkpoint_path=None,
+                 write_db=True, commit_every=50):
+    """
+    Look up every case in `input_path` and stream results to `output_path`
+    (JSONL, appended) and QueryLog.
+
+    Finished cases are appended to the checkpoint file after their batch is
+    committed, so an interrupted run resumes where it stopped; a case may be
+    written twice if the run dies between the output and the checkpoint.
+    Must run inside an app context when `write_db` is set.
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    finished = load_checkpoint(checkpoint_path)
+    todo = {case_key(case) for case in read_cases(input_path)} - finished
+    progress = Progress(len(todo))
+    skipped = 0
+    limiter = TokenBucket(rate=rate, capacity=max(1.0, rate))
+    uncommitted = []
+
+    def lookup(case):
+        started = time.perf_counter()
+        try:
+            result, error = fetch_case_details(*case)
+        except Exception as e:
+            result, error = None, f"Unexpected error: {e}"
+        return case, result, error, (time.perf_counter() - started) * 1000
+
+    def checkpoint():
+        if write_db:
+            db.session.commit()
+        with open(checkpoint_path, 'a', encoding='utf-8') as fh:
+            fh.writelines(f"{key}\n" for key in uncommitted)
+        uncommitted.clear()
+
+    def record(output, future):
+        case, result, error, duration_ms = future.result()
+        status = 'success' if result else 'error'
+        payload = {
+            'result': result.to_dict() if result else None,
+            'error': error
+        }
+        output.write(dumps(dict(zip(FIELDS, case), status=status, duration_ms=round(duration_ms, 1),
+                                **payload)) + '\n')
+        output.flush()
+        if write_db:
+            db.session.add(QueryLog(case_type=case[0], case_number=case[1], filing_year=case[2],
+                                    timestamp=datetime.utcnow(), status=status, duration_ms=duration_ms,
+                                    raw_response=dumps(payload)))
+        uncommitted.append(case_key(case))
+        if len(uncommitted) >= commit_every:
+            checkpoint()
+        progress.update(bool(result))
+
+    pending = set()
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ingest') as executor:
+        try:
+            for case in read_cases(input_path):
+                key = case_key(case)
+                if key not in todo:
+                    skipped += 1
+                    continue
+                todo.discard(key)
+
+                # Keep a bounded number of lookups queued
+                while len(pending) >= concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(output, future)
+
+                limiter.acquire()
+                pending.add(executor.submit(lookup, case))
+
+            for future in pending:
+                record(output, future)
+            pending = set()
+        finally:
+            for future in pending:
+                future.cancel()
+            checkpoint()
+            progress.render()
+            progress.stream.write('\n')
+
+    return {'processed': progress.done, 'failed': progress.failed, 'skipped': skipped}
@@ -0,0 +1,80 @@
+"""
+Compiled keyword matching for question intents
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over a fixed keyword set.
+
+    `find` reports every keyword occurring anywhere in the text (substring
+    semantics, like `keyword in text`) in one pass over its characters.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(sorted({keyword.lower() for keyword in keywords}))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[frozenset] = [frozenset()]
+
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(frozenset())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state] = self._output[state] | {keyword}
+
+        # Breadth-first so each state's failure target is already complete
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] | self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> set:
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class IntentMatcher:
+    """
+    Matches every intent from one automaton pass.
+
+    An intent is a name plus groups of alternative keywords; it matches when
+    each group has at least one keyword in the text. Among matching intents
+    the one declared first wins, so declaration order is the precedence.
+    """
+
+    def __init__(self, intents: Sequence[Tuple[str, Sequence[Sequence[str]]]]):
+        self.intents = tuple((name, tuple(frozenset(k.lower() for k in group) for group in groups))
+                             for name, groups in intents)
+        self.automaton = KeywordAutomaton(k for _, groups in self.intents for group in groups for k in group)
+
+    def match(self, text: str) -> Optional[str]:
+        found = self.automaton.find(text)
+        for name, groups in self.intents:
+            if all(group & found for group in groups):
+                return name
+        return None
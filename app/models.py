@@ -5,6 +5,33 @@ class QueryLog(db.Model):
     case_type = db.Column(db.String(50))
     case_number = db.Column(db.String(50))
     filing_year = db.Column(db.String(10))
-    timestamp = db.Column(db.DateTime, server_default=db.func.now())
+    timestamp = db.Column(db.DateTime, server_default=db.func.now(), index=True)
     raw_response = db.Column(db.Text)
     status = db.Column(db.String(20))
+    duration_ms = db.Column(db.Float)
+
+class QueryDailyRollup(db.Model):
+    """One day of QueryLog rows, aggregated per case type and status"""
+    __table_args__ = (db.UniqueConstraint('day', 'case_type', 'status'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    case_type = db.Column(db.String(50))
+    status = db.Column(db.String(20))
+    count = db.Column(db.Integer, nullable=False, default=0)
+    timed_count = db.Column(db.Integer, nullable=False, default=0)
+    total_ms = db.Column(db.Float, nullable=False, default=0.0)
+    max_ms = db.Column(db.Float)
+    # JSON list of counts per LATENCY_BUCKETS_MS bucket
+    latency_histogram = db.Column(db.Text)
+
+class QueryRollupTotal(db.Model):
+    """All-time totals of QueryDailyRollup per case type and status"""
+    __table_args__ = (db.UniqueConstraint('case_type', 'status'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    case_type = db.Column(db.String(50))
+    status = db.Column(db.String(20))
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # JSON list of counts per LATENCY_BUCKETS_MS bucket
+    latency_histogram = db.Column(db.Text)
@@ -0,0 +1,187 @@
+"""
+Background prefetch of latest-order PDFs so downloads are served locally
+"""
+
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are fetched first
+PRIORITY_LATEST_ORDER = 10
+
+# Tokens left in the upstream bucket for interactive searches
+INTERACTIVE_RESERVE = 1
+
+
+class PdfPrefetcher:
+    """
+    Low-priority background fetcher for order PDFs.
+
+    After a successful search the route queues the latest order's PDF; a
+    single daemon thread downloads it into a local cache directory, only
+    taking upstream rate-limit tokens while some remain for interactive
+    searches. /download serves cached files without an upstream round trip.
+    Files expire after max_age seconds, and the oldest are evicted once the
+    directory exceeds max_bytes.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.cache_dir = None
+        self.timeout = 30
+        self.max_bytes = 256 * 1024 * 1024
+        self.max_age = 7 * 86400
+        self.session = None
+        self._queue = None
+        self._pending = set()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.prefetched = 0
+        self.failed = 0
+        self.dropped = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PDF_PREFETCH_ENABLED', False)
+        self.cache_dir = app.config.get('PDF_CACHE_DIR') or os.path.join(app.instance_path, 'pdf_cache')
+        self.timeout = app.config.get('PDF_PREFETCH_TIMEOUT', 30)
+        self.max_bytes = app.config.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+        self.max_age = app.config.get('PDF_CACHE_MAX_AGE', 7 * 86400)
+        self._queue = queue.PriorityQueue(maxsize=app.config.get('PDF_PREFETCH_QUEUE_SIZE', 100))
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.prune()
+
+    def cache_path(self, pdf_url):
+        """Local file a PDF URL is cached under"""
+        digest = hashlib.sha256(pdf_url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pdf")
+
+    def enqueue(self, pdf_url, priority=PRIORITY_LATEST_ORDER):
+        """Queue a PDF for prefetch; returns True if it was queued"""
+        if not self.enabled or not pdf_url or not pdf_url.startswith(('http://', 'https://')):
+            return False
+        if self._fresh(self.cache_path(pdf_url)):
+            return False
+
+        with self._lock:
+            if pdf_url in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((priority, next(self._counter), pdf_url))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._pending.add(pdf_url)
+            self._ensure_worker()
+        return True
+
+    def lookup(self, pdf_url):
+        """Return the cached file for a PDF URL, recording a hit or miss"""
+        if self.cache_dir:
+            path = self.cache_path(pdf_url)
+            if self._fresh(path):
+                self.hits += 1
+                return path
+        self.misses += 1
+        return None
+
+    def store(self, pdf_url, content):
+        """Atomically write PDF bytes into the cache"""
+        path = self.cache_path(pdf_url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp_path, path)
+        self.prune()
+        return path
+
+    def _fresh(self, path):
+        try:
+            return time.time() - os.path.getmtime(path) < self.max_age
+        except OSError:
+            return False
+
+    def prune(self):
+        """Drop expired PDFs, then the oldest ones until the cache fits max_bytes"""
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pdf'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        expired_before = time.time() - self.max_age
+        for mtime, size, path in files:
+            if mtime >= expired_before and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'prefetched': self.prefetched,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'evicted': self.evicted,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None
+        }
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='pdf-prefetch', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        from .scraper import scraper
+
+        # Request threads use scraper.session; requests sessions are not thread-safe
+        if self.session is None:
+            self.session = scraper.new_session()
+        while True:
+            _, _, pdf_url = self._queue.get()
+            try:
+                # Yield to interactive searches: wait until the shared
+                # bucket has spare tokens beyond the reserve
+                while not scraper.rate_limiter.try_acquire(reserve=INTERACTIVE_RESERVE):
+                    time.sleep(scraper.rate_limiter.wait_time(reserve=INTERACTIVE_RESERVE) or 0.05)
+
+                response = self.session.get(pdf_url, timeout=self.timeout)
+                response.raise_for_status()
+                self.store(pdf_url, response.content)
+                self.prefetched += 1
+                logger.info(f"Prefetched order PDF: {pdf_url}")
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"PDF prefetch failed for {pdf_url}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(pdf_url)
+                self._queue.task_done()
+
+
+# Global prefetcher instance
+pdf_prefetcher = PdfPrefetcher()
@@ -0,0 +1,199 @@
+"""
+Sampling profiler for individual production requests
+"""
+
+import contextvars
+import heapq
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+# Views that can be profiled
+PROFILED_ENDPOINTS = ('main.index', 'main.api_search', 'main.analyze_case')
+
+# Header that forces profiling of a request when it carries PROFILE_TOKEN
+PROFILE_HEADER = 'X-Profile-Token'
+
+# Sampler of the request being profiled, if any
+_active_sampler = contextvars.ContextVar('active_sampler', default=None)
+
+
+def follow(fn):
+    """
+    Wrap fn, about to be handed to a worker thread, so the thread running it
+    is sampled along with the profiled request that submitted it
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return fn
+
+    @wraps(fn)
+    def followed(*args, **kwargs):
+        token = _active_sampler.set(sampler)
+        sampler.add_thread(threading.get_ident())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.remove_thread(threading.get_ident())
+            _active_sampler.reset(token)
+    return followed
+
+
+class StackSampler:
+    """Periodically samples the call stacks of a set of threads into collapsed stacks"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_ids = {thread_id}
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def add_thread(self, thread_id):
+        self.thread_ids = self.thread_ids | {thread_id}
+
+    def remove_thread(self, thread_id):
+        self.thread_ids = self.thread_ids - {thread_id}
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(names))] += 1
+
+
+class RequestProfiler:
+    """
+    Profiles a sample of requests to selected views.
+
+    A request is profiled when it wins the PROFILE_SAMPLE_RATE draw or sends
+    PROFILE_TOKEN in the X-Profile-Token header. Each profile is written as a
+    collapsed-stack file (flamegraph.pl / speedscope input) and only the
+    PROFILE_KEEP slowest are kept on disk. When neither setting is configured
+    the views are left unwrapped, so there is no per-request cost.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.token = None
+        self.interval = 0.005
+        self.keep = 20
+        self.profile_dir = None
+        self._slowest = []  # min-heap of (duration_ms, filename, summary)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or bool(self.token)
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.token = app.config.get('PROFILE_TOKEN')
+        self.interval = app.config.get('PROFILE_INTERVAL', 0.005)
+        self.keep = app.config.get('PROFILE_KEEP', 20)
+        self.profile_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        if not self.enabled:
+            return
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        for endpoint in PROFILED_ENDPOINTS:
+            if endpoint in app.view_functions:
+                app.view_functions[endpoint] = self.wrap(endpoint, app.view_functions[endpoint])
+
+    def should_profile(self):
+        if self.token and request.headers.get(PROFILE_HEADER) == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def wrap(self, endpoint, view):
+        @wraps(view)
+        def profiled_view(*args, **kwargs):
+            if not self.should_profile():
+                return view(*args, **kwargs)
+
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            started = time.perf_counter()
+            sampler.start()
+            token = _active_sampler.set(sampler)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                _active_sampler.reset(token)
+                stacks = sampler.stop()
+                duration_ms = (time.perf_counter() - started) * 1000
+                self.record(endpoint, duration_ms, stacks)
+        return profiled_view
+
+    def record(self, endpoint, duration_ms, stacks):
+        """Write a profile and keep it if it is among the slowest"""
+        summary = {
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'duration_ms': round(duration_ms, 1),
+            'samples': sum(stacks.values()),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        with self._lock:
+            if len(self._slowest) >= self.keep and duration_ms <= self._slowest[0][0]:
+                return
+            filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{endpoint.replace('.', '_')}.folded"
+            summary['file'] = filename
+            with open(os.path.join(self.profile_dir, filename), 'w') as fh:
+                for stack, count in stacks.most_common():
+                    fh.write(f"{stack} {count}\n")
+
+            if len(self._slowest) >= self.keep:
+                _, evicted, _ = heapq.heapreplace(self._slowest, (duration_ms, filename, summary))
+                try:
+                    os.remove(os.path.join(self.profile_dir, evicted))
+                except OSError:
+                    pass
+            else:
+                heapq.heappush(self._slowest, (duration_ms, filename, summary))
+
+        logger.info(f"Profiled {endpoint} in {duration_ms:.1f} ms -> {filename}")
+
+    def slowest(self):
+        """Kept profiles, slowest first"""
+        with self._lock:
+            return [summary for _, _, summary in sorted(self._slowest, reverse=True)]
+
+    def profile_path(self, filename):
+        """Path of a kept profile file, or None"""
+        with self._lock:
+            kept = {name for _, name, _ in self._slowest}
+        if filename not in kept:
+            return None
+        return os.path.join(self.profile_dir, filename)
+
+
+# Global profiler instance
+request_profiler = RequestProfiler()
@@ -0,0 +1,161 @@
+"""
+Compact record types for case data passed between the scraper, AI bot and routes
+"""
+
+from datetime import date, datetime
+from typing import Dict, Optional, Union
+
+# Sentinel shown to users (and emitted in JSON) when a field is missing
+NOT_AVAILABLE = 'Information not available'
+
+# Placeholder URL used by the templates when an order has no PDF
+NO_PDF_URL = '#'
+
+# Date layouts seen on the portal, tried in order after ISO
+DATE_FORMATS = ('%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y', '%d %b %Y', '%d %B %Y')
+
+DateValue = Union[date, str, None]
+
+
+def parse_date(value) -> DateValue:
+    """Parse a portal date once; unknown layouts are kept verbatim"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    value = str(value).strip()
+    if not value or value == NOT_AVAILABLE:
+        return None
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return value
+
+
+def format_date(value: DateValue) -> str:
+    """Render a parsed date the way the templates and API expect it"""
+    if value is None:
+        return NOT_AVAILABLE
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _text(value) -> Optional[str]:
+    """Normalise a free-text field, mapping the sentinel to None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value or value == NOT_AVAILABLE:
+        return None
+    return value
+
+
+class OrderRef:
+    """Latest order/judgment reference for a case"""
+
+    __slots__ = ('date', 'pdf_url')
+
+    def __init__(self, date: DateValue = None, pdf_url: Optional[str] = None):
+        self.date = parse_date(date)
+        self.pdf_url = pdf_url if pdf_url and pdf_url != NO_PDF_URL else None
+
+    @property
+    def has_pdf(self) -> bool:
+        return self.pdf_url is not None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['OrderRef']:
+        if not data:
+            return None
+        return cls(data.get('date'), data.get('pdf_url'))
+
+    def to_dict(self) -> Dict:
+        return {
+            'date': format_date(self.date),
+            'pdf_url': self.pdf_url or NO_PDF_URL
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, OrderRef):
+            return NotImplemented
+        return self.date == other.date and self.pdf_url == other.pdf_url
+
+    def __repr__(self):
+        return f"OrderRef(date={self.date!r}, pdf_url={self.pdf_url!r})"
+
+
+class CaseRecord:
+    """
+    Case details with dates parsed once at construction.
+
+    Missing values are stored as None and only turned back into the
+    'Information not available' sentinel by to_dict() at the JSON/template
+    boundary.
+    """
+
+    __slots__ = ('case_title', 'parties', 'filing_date', 'next_hearing', 'latest_order')
+
+    def __init__(self, case_title: Optional[str] = None, parties: Optional[str] = None,
+                 filing_date: DateValue = None, next_hearing: DateValue = None,
+                 latest_order: Optional[OrderRef] = None):
+        self.case_title = _text(case_title)
+        self.parties = _text(parties)
+        self.filing_date = parse_date(filing_date)
+        self.next_hearing = parse_date(next_hearing)
+        self.latest_order = latest_order
+
+    @property
+    def case_type(self) -> str:
+        """Case type prefix of the title, e.g. 'WP(C)' for 'WP(C) 1234/2024'"""
+        if not self.case_title:
+            return ''
+        return self.case_title.split()[0]
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'CaseRecord':
+        data = data or {}
+        return cls(
+            case_title=data.get('case_title'),
+            parties=data.get('parties'),
+            filing_date=data.get('filing_date'),
+            next_hearing=data.get('next_hearing'),
+            latest_order=OrderRef.from_dict(data.get('latest_order'))
+        )
+
+    @classmethod
+    def coerce(cls, value) -> 'CaseRecord':
+        """Accept either a CaseRecord or a legacy case dict"""
+        if isinstance(value, cls):
+            return value
+        return cls.from_dict(value)
+
+    def to_dict(self) -> Dict:
+        data = {
+            'case_title': self.case_title or NOT_AVAILABLE,
+            'parties': self.parties or NOT_AVAILABLE,
+            'filing_date': format_date(self.filing_date),
+            'next_hearing': format_date(self.next_hearing)
+        }
+        if self.latest_order is not None:
+            data['latest_order'] = self.latest_order.to_dict()
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, CaseRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"CaseRecord(case_title={self.case_title!r}, filing_date={self.filing_date!r})"
@@ -0,0 +1,226 @@
+"""
+QueryLog retention: roll old rows into daily aggregates and prune them
+"""
+
+import bisect
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from . import db
+from .models import QueryLog, QueryDailyRollup, QueryRollupTotal
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+def latency_bucket(duration_ms: float) -> int:
+    """Index of the histogram bucket a duration falls into"""
+    return bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)
+
+
+def merge_histograms(left: List[int], right: List[int]) -> List[int]:
+    size = len(LATENCY_BUCKETS_MS) + 1
+    left = (left or []) + [0] * (size - len(left or []))
+    right = (right or []) + [0] * (size - len(right or []))
+    return [a + b for a, b in zip(left, right)]
+
+
+def histogram_percentile(histogram: List[int], percentile: float) -> Optional[float]:
+    """
+    Approximate a percentile as the upper bound of the bucket that holds it.
+
+    Durations past the last bound are reported as that bound.
+    """
+    total = sum(histogram or [])
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return float(LATENCY_BUCKETS_MS[min(index, len(LATENCY_BUCKETS_MS) - 1)])
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def _archive_rows(archive_dir: str, day, rows: List[QueryLog]):
+    """Append a day's raw rows to a gzipped JSONL archive"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"query_log-{day.isoformat()}.jsonl.gz")
+    with gzip.open(path, 'at', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps({
+                'id': row.id,
+                'case_type': row.case_type,
+                'case_number': row.case_number,
+                'filing_year': row.filing_year,
+                'timestamp': row.timestamp,
+                'raw_response': row.raw_response,
+                'status': row.status,
+                'duration_ms': row.duration_ms
+            }, default=str) + '\n')
+
+
+def _add_to_totals(case_type: str, status: str, count: int, histogram: List[int]):
+    total = QueryRollupTotal.query.filter_by(case_type=case_type, status=status).first()
+    if total is None:
+        total = QueryRollupTotal(case_type=case_type, status=status, count=0)
+        db.session.add(total)
+    total.count += count
+    total.latency_histogram = json.dumps(merge_histograms(json.loads(total.latency_histogram or '[]'), histogram))
+
+
+def rebuild_rollup_totals() -> int:
+    """Recompute QueryRollupTotal from every daily rollup; returns the number of rollups read"""
+    QueryRollupTotal.query.delete()
+    rows = 0
+    for rollup in QueryDailyRollup.query.yield_per(1000):
+        _add_to_totals(rollup.case_type, rollup.status, rollup.count, json.loads(rollup.latency_histogram or '[]'))
+        rows += 1
+    db.session.commit()
+    return rows
+
+
+def rollup_query_logs(retention_days: int = 30, archive_dir: Optional[str] = None,
+                      batch_size: int = 1000) -> Dict:
+    """
+    Aggregate QueryLog rows older than `retention_days` into QueryDailyRollup
+    (and the all-time QueryRollupTotal) and delete them, archiving them
+    first if `archive_dir` is set.
+
+    Works one day and one batch at a time so memory stays bounded.
+    """
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), datetime.min.time())
+    rolled_rows = 0
+    rolled_days = 0
+
+    while True:
+        oldest = db.session.query(func.min(QueryLog.timestamp)).filter(QueryLog.timestamp < cutoff).scalar()
+        if oldest is None:
+            break
+
+        day = oldest.date()
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        groups = {}
+
+        while True:
+            rows = (QueryLog.query
+                    .filter(QueryLog.timestamp >= day_start, QueryLog.timestamp < day_end)
+                    .order_by(QueryLog.id)
+                    .limit(batch_size)
+                    .all())
+            if not rows:
+                break
+
+            for row in rows:
+                group = groups.setdefault((row.case_type, row.status), {
+                    'count': 0, 'timed_count': 0, 'total_ms': 0.0, 'max_ms': None,
+                    'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+                })
+                group['count'] += 1
+                if row.duration_ms is not None:
+                    group['timed_count'] += 1
+                    group['total_ms'] += row.duration_ms
+                    group['max_ms'] = max(group['max_ms'] or 0.0, row.duration_ms)
+                    group['histogram'][latency_bucket(row.duration_ms)] += 1
+
+            if archive_dir:
+                _archive_rows(archive_dir, day, rows)
+            QueryLog.query.filter(QueryLog.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+            rolled_rows += len(rows)
+
+        for (case_type, status), group in groups.items():
+            rollup = QueryDailyRollup.query.filter_by(day=day, case_type=case_type, status=status).first()
+            if rollup is None:
+                rollup = QueryDailyRollup(day=day, case_type=case_type, status=status,
+                                          count=0, timed_count=0, total_ms=0.0)
+                db.session.add(rollup)
+            rollup.count += group['count']
+            rollup.timed_count += group['timed_count']
+            rollup.total_ms += group['total_ms']
+            if group['max_ms'] is not None:
+                rollup.max_ms = max(rollup.max_ms or 0.0, group['max_ms'])
+            rollup.latency_histogram = json.dumps(
+                merge_histograms(json.loads(rollup.latency_histogram or '[]'), group['histogram']))
+            _add_to_totals(case_type, status, group['count'], group['histogram'])
+
+        db.session.commit()
+        rolled_days += 1
+        logger.info(f"Rolled up QueryLog for {day}")
+
+    return {'rows': rolled_rows, 'days': rolled_days, 'cutoff': cutoff.isoformat()}
+
+
+def query_stats(since: Optional[datetime] = None) -> Dict:
+    """
+    Search statistics from the rollups plus the not-yet-rolled rows.
+
+    All-time stats read QueryRollupTotal (one row per case type and status)
+    and the retention window of raw rows, so their cost does not grow with
+    total history. With `since`, the daily rollups in that window are read
+    instead, so the cost grows with the number of days asked for.
+    """
+    totals = {}
+
+    def add(case_type, status, count, histogram):
+        entry = totals.setdefault((case_type, status), {'count': 0, 'histogram': []})
+        entry['count'] += count
+        entry['histogram'] = merge_histograms(entry['histogram'], histogram)
+
+    if since is None:
+        rollups = db.session.query(QueryRollupTotal.case_type, QueryRollupTotal.status,
+                                   QueryRollupTotal.count, QueryRollupTotal.latency_histogram)
+    else:
+        rollups = (db.session.query(QueryDailyRollup.case_type, QueryDailyRollup.status,
+                                    QueryDailyRollup.count, QueryDailyRollup.latency_histogram)
+                   .filter(QueryDailyRollup.day >= since.date()))
+    for case_type, status, count, histogram in rollups:
+        add(case_type, status, count, json.loads(histogram or '[]'))
+
+    bucket = case(
+        *[(QueryLog.duration_ms <= bound, index) for index, bound in enumerate(LATENCY_BUCKETS_MS)],
+        else_=len(LATENCY_BUCKETS_MS)
+    )
+    recent = (db.session.query(QueryLog.case_type, QueryLog.status, bucket,
+                               func.count(QueryLog.id), func.count(QueryLog.duration_ms))
+              .group_by(QueryLog.case_type, QueryLog.status, bucket))
+    if since is not None:
+        recent = recent.filter(QueryLog.timestamp >= since)
+    for case_type, status, bucket_index, count, timed in recent:
+        histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        histogram[bucket_index] = timed
+        add(case_type, status, count, histogram)
+
+    by_case_type = {}
+    by_status = {}
+    latency = []
+    for (case_type, status), entry in totals.items():
+        type_entry = by_case_type.setdefault(case_type or 'unknown', {'total': 0})
+        type_entry['total'] += entry['count']
+        type_entry[status or 'unknown'] = type_entry.get(status or 'unknown', 0) + entry['count']
+        by_status[status or 'unknown'] = by_status.get(status or 'unknown', 0) + entry['count']
+        latency = merge_histograms(latency, entry['histogram'])
+
+    total = sum(by_status.values())
+    latest_rollup = db.session.query(func.max(QueryDailyRollup.day)).scalar()
+    return {
+        'total': total,
+        'success_rate': round(by_status.get('success', 0) / total, 3) if total else None,
+        'by_status': by_status,
+        'by_case_type': by_case_type,
+        'latency_ms': {
+            'p50': histogram_percentile(latency, 50),
+            'p95': histogram_percentile(latency, 95),
+            'p99': histogram_percentile(latency, 99)
+        },
+        'latest_rollup': latest_rollup.isoformat() if latest_rollup else None
+    }
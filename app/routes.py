@@ -1,17 +1,102 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from .scraper import fetch_case_details
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
+from .scraper import cached_case_details, case_cache, fetch_upstream, validate_lookup, CASE_TYPES
+from .admission import admission_controller, AdmissionRejected, INTERACTIVE, BULK
+from .admin import admin_required
 from .ai_bot import ai_bot
+from .prefetch import pdf_prefetcher
+from .suggest import case_suggester
+from .contexts import case_contexts
+from .http_cache import content_etag, etag_matches, not_modified
+from .serializers import api_response, dumps
 from .models import QueryLog
 from . import db
-import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 main = Blueprint('main', __name__)
 
+MAX_BATCH_QUESTIONS = 50
+
+@main.app_context_processor
+def inject_case_types():
+    """Make the case type catalog available to every template"""
+    return {'case_types': CASE_TYPES}
+
+def lookup_case(priority, case_type, case_number, filing_year):
+    """
+    fetch_case_details with admission control on the upstream search.
+    Returns (result, error, rejection). Invalid inputs, demo cases and cached
+    answers never spend the client's rate limit; a shed lookup falls back to
+    stale data before being rejected.
+    """
+    validation_error = validate_lookup(case_type, case_number, filing_year)
+    if validation_error:
+        return None, validation_error, None
+    
+    cached = cached_case_details(case_type, case_number, filing_year)
+    if cached:
+        return cached[0], cached[1], None
+    
+    try:
+        with admission_controller.admit(priority):
+            result, error = fetch_upstream(case_type, case_number, filing_year)
+            return result, error, None
+    except AdmissionRejected as rejected:
+        stale = case_cache.get_stale(case_cache.make_key(case_type, case_number, filing_year))
+        if stale is not None:
+            return stale, None, None
+        return None, None, rejected
+
+def _lookup_fields(data):
+    return [str(data.get(field) or '').strip() for field in ('case_type', 'case_number', 'filing_year')]
+
+def context_request_error(data):
+    """Error message if an ask request does not identify a case, else None"""
+    context_id = data.get('context_id')
+    if context_id is not None:
+        if not isinstance(context_id, str) or not context_id:
+            return 'context_id must be a non-empty string'
+        return None
+    if all(_lookup_fields(data)):
+        return None
+    if data.get('case_data') is None:
+        return 'Provide context_id, case_type/case_number/filing_year or case_data'
+    case_data = data['case_data']
+    if not isinstance(case_data, dict) or not case_data:
+        return 'case_data must be a non-empty object'
+    return None
+
+def resolve_context(data):
+    """
+    (context_id, context) for an ask request validated by
+    context_request_error: by context_id, by case lookup fields from the
+    result cache, or registered from case_data. The context is None if the
+    id expired or the case is not cached.
+    """
+    context_id = data.get('context_id')
+    if context_id is not None:
+        return context_id, case_contexts.get(context_id)
+    
+    lookup = _lookup_fields(data)
+    if all(lookup):
+        return case_contexts.register_lookup(*lookup) or (None, None)
+    
+    return case_contexts.register(data['case_data'])
+
+def case_found(result, case_type, case_number, filing_year):
+    """Follow-up work after a successful lookup"""
+    # Make the case available to autocomplete
+    case_suggester.add_case(case_type, case_number, filing_year)
+    
+    # Queue the latest order PDF for background download
+    if result.latest_order and result.latest_order.has_pdf:
+        pdf_prefetcher.enqueue(result.latest_order.pdf_url)
+
 @main.route('/', methods=['GET', 'POST'])
 def index():
     result = None
     ai_analysis = None
+    context_id = None
     if request.method == 'POST':
         case_type = request.form.get('case_type', '').strip()
         case_number = request.form.get('case_number', '').strip()
@@ -33,16 +118,24 @@ def index():
         db.session.add(query_log)
         db.session.commit()
 
+        started = time.perf_counter()
         try:
             # Call scraper function
-            result, error = fetch_case_details(case_type, case_number, filing_year)
+            result, error, rejected = lookup_case(INTERACTIVE, case_type, case_number, filing_year)
+            
+            if rejected:
+                query_log.status = 'shed'
+                db.session.commit()
+                flash(rejected.message, 'warning')
+                return render_template('index.html'), rejected.status, rejected.headers
             
             # Update log with result
             query_log.status = 'success' if result else 'error'
-            query_log.raw_response = json.dumps({
-                'result': result,
+            query_log.duration_ms = (time.perf_counter() - started) * 1000
+            query_log.raw_response = dumps({
+                'result': result.to_dict() if result else None,
                 'error': error
-            }, default=str)
+            })
             db.session.commit()
 
             if error:
@@ -51,15 +144,19 @@ def index():
             
             # Get AI analysis if case found
             if result:
+                case_found(result, case_type, case_number, filing_year)
                 ai_analysis = ai_bot.analyze_case(result)
+                context_id, _ = case_contexts.register(result)
             
             flash('Case details retrieved successfully!', 'success')
-            return render_template('results.html', result=result, ai_analysis=ai_analysis)
+            return render_template('results.html', result=result.to_dict(), ai_analysis=ai_analysis,
+                                   context_id=context_id)
             
         except Exception as e:
             # Update log with error
             query_log.status = 'error'
-            query_log.raw_response = json.dumps({'error': str(e)}, default=str)
+            query_log.duration_ms = (time.perf_counter() - started) * 1000
+            query_log.raw_response = dumps({'error': str(e)})
             db.session.commit()
             
             flash(f'An unexpected error occurred: {str(e)}', 'danger')
@@ -71,13 +168,25 @@ def index():
 def download_pdf(pdf_url):
     """Download PDF from the court website"""
     try:
+        from flask import send_file
+        from io import BytesIO
+        
+        download_name = f'court_order_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.pdf'
+        
+        # Serve prefetched copies without an upstream round trip
+        cached_path = pdf_prefetcher.lookup(pdf_url)
+        if cached_path:
+            return send_file(
+                cached_path,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=download_name
+            )
+        
         import requests
         response = requests.get(pdf_url, stream=True)
         response.raise_for_status()
         
-        from flask import send_file
-        from io import BytesIO
-        
         # Create a file-like object from the response content
         pdf_content = BytesIO(response.content)
         pdf_content.seek(0)
@@ -86,7 +195,7 @@ def download_pdf(pdf_url):
             pdf_content,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'court_order_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.pdf'
+            download_name=download_name
         )
     except Exception as e:
         flash(f'Error downloading PDF: {str(e)}', 'danger')
@@ -98,42 +207,104 @@ def query_history():
     logs = QueryLog.query.order_by(QueryLog.timestamp.desc()).limit(50).all()
     return render_template('history.html', logs=logs)
 
-@main.route('/api/search', methods=['POST'])
+@main.route('/api/search', methods=['GET', 'POST'])
 def api_search():
-    """API endpoint for AJAX searches"""
-    data = request.get_json()
+    """API endpoint for AJAX searches (GET with query args for cacheable polling)"""
+    data = request.args if request.method == 'GET' else request.get_json()
     case_type = data.get('case_type', '').strip()
     case_number = data.get('case_number', '').strip()
     filing_year = data.get('filing_year', '').strip()
 
     if not case_type or not case_number or not filing_year:
-        return jsonify({'error': 'All fields are required'}), 400
+        return api_response({'error': 'All fields are required'}, 400)
 
-    result, error = fetch_case_details(case_type, case_number, filing_year)
+    result, error, rejected = lookup_case(BULK, case_type, case_number, filing_year)
+    
+    if rejected:
+        return api_response({'error': rejected.message}, rejected.status, rejected.headers)
     
     if error:
-        return jsonify({'error': error}), 400
+        return api_response({'error': error}, 400)
+    
+    result_data = result.to_dict() if result else None
+    etag = content_etag(result_data)
+    if etag_matches(etag):
+        return not_modified(etag)
+    
+    if result:
+        case_found(result, case_type, case_number, filing_year)
     
     # Get AI analysis
     ai_analysis = ai_bot.analyze_case(result) if result else None
     
-    return jsonify({'result': result, 'ai_analysis': ai_analysis})
+    return api_response({'result': result_data, 'ai_analysis': ai_analysis}, etag=etag)
+
+def context_missing():
+    return api_response({'error': 'Unknown or expired context, please resend case_data',
+                         'code': 'context_expired'}, 404)
 
 @main.route('/api/ask', methods=['POST'])
 def ask_ai():
     """API endpoint for asking AI questions about cases"""
     data = request.get_json()
-    question = data.get('question', '').strip()
-    case_data = data.get('case_data', {})
+    if not isinstance(data, dict):
+        return api_response({'error': 'Request body must be a JSON object'}, 400)
+    question = data.get('question')
+
+    if not isinstance(question, str) or not question.strip():
+        return api_response({'error': 'Question is required'}, 400)
+    question = question.strip()
+    error = context_request_error(data)
+    if error:
+        return api_response({'error': error}, 400)
+
+    try:
+        context_id, context = resolve_context(data)
+        if context is None:
+            return context_missing()
+
+        etag = content_etag(question, context_id)
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        answer = ai_bot.answer_question(question, context['case'], context)
+        return api_response({'answer': answer, 'context_id': context_id}, etag=etag)
+    except Exception as e:
+        return api_response({'error': f'Error processing question: {str(e)}'}, 500)
+
+@main.route('/api/ask/batch', methods=['POST'])
+def ask_ai_batch():
+    """Answer several questions about one case in a single request"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return api_response({'error': 'Request body must be a JSON object'}, 400)
+    questions = data.get('questions')
 
-    if not question:
-        return jsonify({'error': 'Question is required'}), 400
+    if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+        return api_response({'error': 'questions must be a list of strings'}, 400)
+    questions = [q.strip() for q in questions]
+    if not questions or not all(questions):
+        return api_response({'error': 'A non-empty list of questions is required'}, 400)
+    if len(questions) > MAX_BATCH_QUESTIONS:
+        return api_response({'error': f'At most {MAX_BATCH_QUESTIONS} questions per batch'}, 400)
+    error = context_request_error(data)
+    if error:
+        return api_response({'error': error}, 400)
 
     try:
-        answer = ai_bot.answer_question(question, case_data)
-        return jsonify({'answer': answer})
+        context_id, context = resolve_context(data)
+        if context is None:
+            return context_missing()
+
+        etag = content_etag(questions, context_id)
+        if etag_matches(etag):
+            return not_modified(etag)
+
+        answers = [ai_bot.answer_question(q, context['case'], context) for q in questions]
+        return api_response({'answers': [{'question': q, 'answer': a} for q, a in zip(questions, answers)],
+                             'context_id': context_id}, etag=etag)
     except Exception as e:
-        return jsonify({'error': f'Error processing question: {str(e)}'}), 500
+        return api_response({'error': f'Error processing questions: {str(e)}'}, 500)
 
 @main.route('/api/analyze', methods=['POST'])
 def analyze_case():
@@ -142,10 +313,51 @@ def analyze_case():
     case_data = data.get('case_data', {})
 
     if not case_data:
-        return jsonify({'error': 'Case data is required'}), 400
+        return api_response({'error': 'Case data is required'}, 400)
+
+    etag = content_etag(case_data)
+    if etag_matches(etag):
+        return not_modified(etag)
 
     try:
         analysis = ai_bot.analyze_case(case_data)
-        return jsonify(analysis)
+        return api_response(analysis, etag=etag)
     except Exception as e:
-        return jsonify({'error': f'Error analyzing case: {str(e)}'}), 500
+        return api_response({'error': f'Error analyzing case: {str(e)}'}, 500)
+
+@main.route('/api/suggest')
+def api_suggest():
+    """Autocomplete for case types and previously fetched cases"""
+    prefix = request.args.get('prefix', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return api_response({'prefix': prefix, 'suggestions': case_suggester.suggest(prefix, limit)})
+
+@main.route('/api/stats')
+def api_stats():
+    """Search statistics served from the daily QueryLog rollups"""
+    from .retention import query_stats
+    
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        return api_response({'error': 'days must be a positive integer'}, 400)
+    since = datetime.utcnow() - timedelta(days=days) if days is not None else None
+    return api_response(query_stats(since))
+
+@main.route('/api/export/<dataset>')
+@admin_required
+def api_export(dataset):
+    """Stream search history or found cases as CSV, JSONL or Parquet (admin only)"""
+    from .export import FORMATS, export_filters, export_stream
+    
+    fmt = request.args.get('format', 'csv')
+    try:
+        filters = export_filters(since=request.args.get('since'), until=request.args.get('until'),
+                                 case_type=request.args.get('case_type'), status=request.args.get('status'))
+        chunks = export_stream(dataset, fmt, filters)
+    except ValueError as e:
+        return api_response({'error': str(e)}, 400)
+    
+    mimetype, extension = FORMATS[fmt]
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
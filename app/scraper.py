@@ -4,24 +4,78 @@ import re
 import time
 from urllib.parse import urljoin
 import logging
+from datetime import date
+from .cache import CaseLookupCache
+from .hedging import HedgingPolicy
+from .records import CaseRecord, OrderRef
+from .shared_state import shared_state
+from .utils import TokenBucket
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upstream politeness limits shared by searches and background fetches
+UPSTREAM_RATE = 2.0   # requests per second
+UPSTREAM_BURST = 4
+UPSTREAM_TIMEOUT = 30  # seconds
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
 class DelhiHighCourtScraper:
-    def __init__(self):
-        self.base_url = "https://delhihighcourt.nic.in"
-        self.search_url = "https://delhihighcourt.nic.in/case-status"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, base_url=None, search_url=None):
+        self.base_url = base_url or "https://delhihighcourt.nic.in"
+        self.search_url = search_url or "https://delhihighcourt.nic.in/case-status"
+        self.timeout = UPSTREAM_TIMEOUT
+        self.session = self.new_session()
+        self.rate_limiter = TokenBucket(rate=UPSTREAM_RATE, capacity=UPSTREAM_BURST)
+        self.hedging = HedgingPolicy()
+        self.viewstate_ttl = 0
+        self.viewstate_cache = None
+    
+    def init_app(self, app):
+        """Apply upstream settings from the Flask config"""
+        self.timeout = app.config.get('SCRAPER_TIMEOUT', UPSTREAM_TIMEOUT)
+        # One upstream budget for every worker process when state is shared
+        self.rate_limiter = shared_state.make_bucket('upstream', rate=UPSTREAM_RATE, capacity=UPSTREAM_BURST)
+        self.viewstate_ttl = app.config.get('SCRAPER_VIEWSTATE_TTL', 0)
+        self.viewstate_cache = shared_state.make_cache('viewstate', maxsize=1, ttl=self.viewstate_ttl) \
+            if self.viewstate_ttl else None
+        self.hedging.configure(
+            self.new_session,
+            enabled=app.config.get('SCRAPER_HEDGING', False),
+            pool_size=app.config.get('SCRAPER_POOL_SIZE', 4),
+            percentile=app.config.get('SCRAPER_HEDGE_PERCENTILE', 95),
+            default_delay=app.config.get('SCRAPER_HEDGE_DELAY', 2.0),
+            budget_ratio=app.config.get('SCRAPER_HEDGE_BUDGET', 0.05)
+        )
+    
+    def new_session(self):
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+        return session
+    
+    def _request(self, method, url, session=None, **kwargs):
+        """Issue an upstream request once the rate limiter allows it"""
+        self.rate_limiter.acquire()
+        kwargs.setdefault('timeout', self.timeout)
+        return (session or self.session).request(method, url, **kwargs)
         
-    def get_viewstate(self):
+    def get_viewstate(self, session=None):
+        """Get the viewstate token, reusing a recent one when SCRAPER_VIEWSTATE_TTL is set"""
+        if self.viewstate_cache is None:
+            return self._fetch_viewstate(session)
+        viewstate = self.viewstate_cache.get('viewstate')
+        if viewstate is None:
+            viewstate = self._fetch_viewstate(session)
+            if viewstate:
+                self.viewstate_cache.set('viewstate', viewstate)
+        return viewstate
+    
+    def _fetch_viewstate(self, session=None):
         """Get the viewstate token from the search page"""
         try:
-            response = self.session.get(self.search_url)
+            response = self._request('GET', self.search_url, session=session)
             response.raise_for_status()
             soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -41,7 +95,7 @@ class DelhiHighCourtScraper:
             logger.error(f"Error getting viewstate: {e}")
             return ''
     
-    def solve_captcha(self, captcha_image_url):
+    def solve_captcha(self, captcha_image_url, session=None):
         """
         Handle CAPTCHA - for now, we'll try to bypass or use a simple approach
         In production, you might want to use a CAPTCHA solving service
@@ -49,7 +103,7 @@ class DelhiHighCourtScraper:
         try:
             # For demo purposes, we'll try to get the CAPTCHA image
             # In a real implementation, you'd send this to a CAPTCHA solving service
-            captcha_response = self.session.get(captcha_image_url)
+            captcha_response = self._request('GET', captcha_image_url, session=session)
             if captcha_response.status_code == 200:
                 # For now, return a placeholder - in production, send to solving service
                 return "DEMO123"  # Placeholder
@@ -59,10 +113,16 @@ class DelhiHighCourtScraper:
             return None
     
     def search_case(self, case_type, case_number, filing_year):
-        """Search for case details"""
+        """Search for case details, hedging slow lookups when enabled"""
+        if self.hedging.enabled:
+            return self.hedging.run(self._search_on_session, case_type, case_number, filing_year)
+        return self._search_on_session(self.session, case_type, case_number, filing_year)
+    
+    def _search_on_session(self, session, case_type, case_number, filing_year):
+        """Run one complete search (viewstate, POST, CAPTCHA) on a session"""
         try:
             # Get the initial page and viewstate
-            viewstate = self.get_viewstate()
+            viewstate = self.get_viewstate(session)
             
             # Prepare search data
             search_data = {
@@ -74,7 +134,7 @@ class DelhiHighCourtScraper:
             }
             
             # Check if CAPTCHA is required
-            response = self.session.post(self.search_url, data=search_data)
+            response = self._request('POST', self.search_url, session=session, data=search_data)
             
             if 'captcha' in response.text.lower() or 'verification' in response.text.lower():
                 # CAPTCHA detected - try to solve
@@ -82,10 +142,10 @@ class DelhiHighCourtScraper:
                 captcha_img = soup.find('img', {'alt': 'CAPTCHA'})
                 if captcha_img:
                     captcha_url = urljoin(self.search_url, captcha_img.get('src', ''))
-                    captcha_solution = self.solve_captcha(captcha_url)
+                    captcha_solution = self.solve_captcha(captcha_url, session)
                     if captcha_solution:
                         search_data['ctl00$ContentPlaceHolder1$txtCaptcha'] = captcha_solution
-                        response = self.session.post(self.search_url, data=search_data)
+                        response = self._request('POST', self.search_url, session=session, data=search_data)
             
             return self.parse_search_results(response.content)
             
@@ -105,7 +165,10 @@ class DelhiHighCourtScraper:
             error_divs = soup.find_all('div', class_='error')
             if error_divs:
                 error_msg = error_divs[0].get_text(strip=True)
-                return None, error_msg
+                if is_not_found_message(error_msg):
+                    return None, error_msg
+                # Captcha, session and viewstate failures clear up on retry
+                return None, f"Portal error: {error_msg}"
             
             # Look for case details table
             case_table = soup.find('table', class_='table') or soup.find('table')
@@ -138,25 +201,16 @@ class DelhiHighCourtScraper:
                         # Look for PDF links
                         pdf_link = cells[1].find('a', href=re.compile(r'\.pdf'))
                         if pdf_link:
-                            case_data['latest_order'] = {
-                                'date': value,
-                                'pdf_url': urljoin(self.base_url, pdf_link.get('href'))
-                            }
+                            case_data['latest_order'] = OrderRef(
+                                date=value,
+                                pdf_url=urljoin(self.base_url, pdf_link.get('href'))
+                            )
             
             # If no specific data found, create a generic response
             if not case_data:
-                case_data = {
-                    'case_title': f"Case {case_data.get('case_title', 'Unknown')}",
-                    'parties': 'Information not available',
-                    'filing_date': 'Information not available',
-                    'next_hearing': 'Information not available',
-                    'latest_order': {
-                        'date': 'Information not available',
-                        'pdf_url': '#'
-                    }
-                }
-            
-            return case_data, None
+                return CaseRecord(case_title='Case Unknown', latest_order=OrderRef()), None
+            
+            return CaseRecord(**case_data), None
             
         except Exception as e:
             logger.error(f"Error parsing results: {e}")
@@ -165,85 +219,152 @@ class DelhiHighCourtScraper:
 # Global scraper instance
 scraper = DelhiHighCourtScraper()
 
+# Case types accepted by the search form and the API
+CASE_TYPES = {
+    'WP(C)': 'Writ Petition (Civil)',
+    'CRL.A': 'Criminal Appeal',
+    'CIVIL': 'Civil Suit',
+    'CRL.M.C': 'Criminal Miscellaneous',
+    'LPA': 'Letters Patent Appeal',
+    'FAO': 'First Appeal from Order',
+    'RFA': 'Regular First Appeal'
+}
+VALID_CASE_TYPES = frozenset(CASE_TYPES)
+
+# The Delhi High Court was established in 1966
+MIN_FILING_YEAR = 1966
+
+# Errors that say nothing about the case itself and are worth retrying soon
+TRANSIENT_ERROR_PREFIXES = ('Network error', 'Unexpected error', 'Error parsing results', 'Portal error')
+
+# Portal error messages that definitively say the case does not exist
+NOT_FOUND_MARKERS = ('no record', 'not found', 'no case', 'no data', 'does not exist')
+
+# Outcomes of upstream lookups, including "not found" answers
+case_cache = CaseLookupCache()
+
+def is_transient_error(error):
+    """Return True if an upstream error is likely to go away on retry"""
+    return bool(error) and error.startswith(TRANSIENT_ERROR_PREFIXES)
+
+def is_not_found_message(message):
+    """Return True if a portal error message says the case does not exist"""
+    message = message.lower()
+    return any(marker in message for marker in NOT_FOUND_MARKERS)
+
+def validate_case_query(case_type, case_number, filing_year, valid_case_types=VALID_CASE_TYPES):
+    """Return an error message for a lookup that cannot succeed, or None"""
+    if not case_type or not case_number or not filing_year:
+        return "All fields are required"
+    
+    if valid_case_types is not None and case_type not in valid_case_types:
+        return f"Unknown case type: {case_type}"
+    
+    if not case_number.isdigit():
+        return "Case number must be numeric"
+    
+    if not filing_year.isdigit() or len(filing_year) != 4:
+        return "Filing year must be a 4-digit year"
+    
+    if not MIN_FILING_YEAR <= int(filing_year) <= date.today().year:
+        return f"Filing year must be between {MIN_FILING_YEAR} and {date.today().year}"
+    
+    return None
+
+# Demo cases served without touching the network:
+# (case_type, case_number, filing_year) -> (parties, filing_date, next_hearing, order_date)
+DEMO_CASES = {
+    ('WP(C)', '1234', '2024'): ('Rajesh Kumar vs. State of Delhi & Ors.', '2024-01-15', '2024-08-20', '2024-07-15'),
+    ('CRL.A', '5678', '2023'): ('State vs. Amit Sharma', '2023-03-22', '2024-09-10', '2024-06-28'),
+    ('CIVIL', '9999', '2022'): ('M/s ABC Corporation vs. M/s XYZ Ltd.', '2022-11-08', '2024-08-15', '2024-07-01'),
+    ('CRL.M.C', '4321', '2021'): ('Priya Singh vs. Commissioner of Police', '2021-09-14', '2024-08-25', '2024-07-10')
+}
+
 def get_demo_case_data(case_type, case_number, filing_year):
     """Return demo case data for testing purposes"""
-    demo_cases = {
-        ('WP(C)', '1234', '2024'): {
-            'case_title': f"{case_type} {case_number}/{filing_year}",
-            'parties': 'Rajesh Kumar vs. State of Delhi & Ors.',
-            'filing_date': '2024-01-15',
-            'next_hearing': '2024-08-20',
-            'latest_order': {
-                'date': '2024-07-15',
-                'pdf_url': '#'  # Placeholder URL
-            }
-        },
-        ('CRL.A', '5678', '2023'): {
-            'case_title': f"{case_type} {case_number}/{filing_year}",
-            'parties': 'State vs. Amit Sharma',
-            'filing_date': '2023-03-22',
-            'next_hearing': '2024-09-10',
-            'latest_order': {
-                'date': '2024-06-28',
-                'pdf_url': '#'  # Placeholder URL
-            }
-        },
-        ('CIVIL', '9999', '2022'): {
-            'case_title': f"{case_type} {case_number}/{filing_year}",
-            'parties': 'M/s ABC Corporation vs. M/s XYZ Ltd.',
-            'filing_date': '2022-11-08',
-            'next_hearing': '2024-08-15',
-            'latest_order': {
-                'date': '2024-07-01',
-                'pdf_url': '#'  # Placeholder URL
-            }
-        },
-        ('CRL.M.C', '4321', '2021'): {
-            'case_title': f"{case_type} {case_number}/{filing_year}",
-            'parties': 'Priya Singh vs. Commissioner of Police',
-            'filing_date': '2021-09-14',
-            'next_hearing': '2024-08-25',
-            'latest_order': {
-                'date': '2024-07-10',
-                'pdf_url': '#'  # Placeholder URL
-            }
-        }
-    }
+    demo_case = DEMO_CASES.get((case_type, case_number, filing_year))
+    if not demo_case:
+        return None
     
-    return demo_cases.get((case_type, case_number, filing_year))
+    parties, filing_date, next_hearing, order_date = demo_case
+    return CaseRecord(
+        case_title=f"{case_type} {case_number}/{filing_year}",
+        parties=parties,
+        filing_date=filing_date,
+        next_hearing=next_hearing,
+        latest_order=OrderRef(date=order_date)  # No PDF for demo cases
+    )
 
-def fetch_case_details(case_type, case_number, filing_year):
+def cached_case_details(case_type, case_number, filing_year, allow_stale=False):
     """
-    Fetch case details from Delhi High Court
+    Answer a lookup from offline backends or the cache without network I/O.
+    Returns (result, error), or None if nothing usable is cached.
     """
-    logger.info(f"Searching for case: {case_type} {case_number}/{filing_year}")
+    from .backends import backend_registry
     
-    # Validate inputs
-    if not case_type or not case_number or not filing_year:
-        return None, "All fields are required"
+    offline, _ = backend_registry.search_offline(case_type, case_number, filing_year)
+    if offline:
+        return offline, None
     
-    if not case_number.isdigit():
-        return None, "Case number must be numeric"
+    cache_key = case_cache.make_key(case_type, case_number, filing_year)
+    cached = case_cache.get(cache_key)
+    if cached:
+        return cached
     
-    if not filing_year.isdigit() or len(filing_year) != 4:
-        return None, "Filing year must be a 4-digit year"
+    if allow_stale:
+        stale = case_cache.get_stale(cache_key)
+        if stale is not None:
+            logger.info("Serving stale cached result")
+            return stale, None
+    
+    return None
+
+def validate_lookup(case_type, case_number, filing_year):
+    """validate_case_query against the case types of the registered backends"""
+    from .backends import backend_registry
     
-    # First try to get demo data for testing
-    demo_data = get_demo_case_data(case_type, case_number, filing_year)
-    if demo_data:
-        logger.info(f"Demo case found: {demo_data['case_title']}")
-        return demo_data, None
+    return validate_case_query(case_type, case_number, filing_year, backend_registry.case_types())
+
+def fetch_upstream(case_type, case_number, filing_year):
+    """
+    Search the court portals for a validated lookup that missed the cache,
+    and cache the outcome
+    """
+    from .backends import backend_registry
     
-    # For non-demo cases, try real scraping
-    logger.info("No demo data found, attempting real scraping...")
-    result, error = scraper.search_case(case_type, case_number, filing_year)
+    logger.info("No demo or cached data, searching court backends...")
+    cache_key = case_cache.make_key(case_type, case_number, filing_year)
+    result, error = backend_registry.search_network(case_type, case_number, filing_year)
     
     if error:
         logger.error(f"Search error: {error}")
+        case_cache.store(cache_key, None, error, transient=is_transient_error(error))
         return None, error
     
     if not result:
-        return None, "No case found with the provided details"
+        error = "No case found with the provided details"
+        case_cache.store(cache_key, None, error)
+        return None, error
     
-    logger.info(f"Successfully found case: {result.get('case_title', 'Unknown')}")
+    case_cache.store(cache_key, result, None)
+    logger.info(f"Successfully found case: {result.case_title or 'Unknown'}")
     return result, None
+
+def fetch_case_details(case_type, case_number, filing_year):
+    """
+    Fetch case details from the registered court backends
+    """
+    logger.info(f"Searching for case: {case_type} {case_number}/{filing_year}")
+    
+    # Validate inputs before any network I/O
+    validation_error = validate_lookup(case_type, case_number, filing_year)
+    if validation_error:
+        return None, validation_error
+    
+    # Demo data, then repeated lookups (including known misses) from the cache
+    cached = cached_case_details(case_type, case_number, filing_year)
+    if cached:
+        logger.info("Serving lookup from demo data or cache")
+        return cached
+    
+    return fetch_upstream(case_type, case_number, filing_year)
@@ -0,0 +1,105 @@
+"""
+Serialization layer: fast JSON for storage and responses, optional MessagePack
+"""
+
+import json
+from datetime import date
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def _default(value):
+    """Fallback for types the encoders do not know"""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def dumps(obj) -> str:
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps(obj) -> str:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps_bytes(obj) -> bytes:
+        return dumps(obj).encode('utf-8')
+
+    def loads(data):
+        return json.loads(data)
+
+
+def packb(obj) -> bytes:
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def unpackb(data):
+    return msgpack.unpackb(data, raw=False)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by the fast encoder (used by jsonify and |tojson)"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def negotiate():
+    """Response mimetype for the current request's Accept header"""
+    if msgpack is not None:
+        best = request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE)
+        if best == MSGPACK_MIMETYPE:
+            return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+
+def api_response(payload, status=200, headers=None, etag=None):
+    """
+    Serialize an API payload as JSON, or MessagePack when the client
+    prefers `application/msgpack` and msgpack is installed.
+    """
+    mimetype = negotiate()
+    body = packb(payload) if mimetype == MSGPACK_MIMETYPE else dumps_bytes(payload)
+    response = current_app.response_class(body, status=status, mimetype=mimetype, headers=headers)
+    response.vary.add('Accept')
+    if etag:
+        # Each representation needs its own strong validator
+        response.set_etag(etag if mimetype == JSON_MIMETYPE else f"{etag}-msgpack")
+    return response
@@ -0,0 +1,100 @@
+"""
+Preforking multi-process HTTP server for production use
+"""
+
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from werkzeug.serving import make_server
+
+logger = logging.getLogger(__name__)
+
+
+def production_config(workers):
+    """Config overrides for serving, unless already set from the environment"""
+    overrides = {}
+    if 'COURT_SERVER_NAME' not in os.environ:
+        # Accept whatever Host the proxy or client uses
+        overrides['SERVER_NAME'] = None
+    if workers > 1 and 'COURT_SHARED_STATE_ENABLED' not in os.environ:
+        overrides['SHARED_STATE_ENABLED'] = True
+    return overrides
+
+
+def _run_worker(app_factory, sock, threaded):
+    """Child process body: build the app and serve on the inherited socket"""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    app = app_factory()
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    logger.info(f"Worker {os.getpid()} serving on {host}:{port}")
+    server.serve_forever()
+
+
+def serve(app_factory, host='127.0.0.1', port=8000, workers=None, threaded=True):
+    """
+    Bind once, fork `workers` processes that accept on the shared socket,
+    and replace any worker that exits until SIGTERM/SIGINT.
+
+    Each worker builds its own app after the fork, so no connections,
+    sessions or threads are shared between processes. Falls back to a
+    single process where fork is unavailable.
+    """
+    workers = workers or os.cpu_count() or 1
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.set_inheritable(True)
+
+    if workers == 1 or not hasattr(os, 'fork'):
+        _run_worker(app_factory, sock, threaded)
+        return
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Ctrl-C reaches the whole process group; the master stops workers
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                _run_worker(app_factory, sock, threaded)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"Starting {workers} workers on {host}:{port}")
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        logger.warning(f"Worker {pid} exited with status {status}, restarting")
+        if time.monotonic() - started < 1:
+            # Avoid a tight crash loop on startup errors
+            time.sleep(1)
+        spawn()
+    sock.close()
@@ -0,0 +1,219 @@
+"""
+Cross-process shared state on SQLite for multi-worker deployments
+"""
+
+import itertools
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+from .cache import TTLCache
+from .utils import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Idle buckets and long-expired cache entries are dropped every PRUNE_EVERY writes
+PRUNE_EVERY = 1000
+PRUNE_AFTER = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key BLOB NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    written_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS ix_cache_entries_written ON cache_entries (namespace, written_at);
+CREATE TABLE IF NOT EXISTS token_buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SharedState:
+    """
+    SQLite database shared by every worker process on a host.
+
+    Each thread of each process gets its own connection (connections never
+    cross a fork). WAL mode lets readers run alongside the single writer;
+    writes are short transactions, so workers rarely wait on each other.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self._local = threading.local()
+        self._writes = itertools.count(1)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SHARED_STATE_ENABLED', False)
+        self.path = app.config.get('SHARED_STATE_PATH') or os.path.join(app.instance_path, 'shared_state.db')
+        self._local = threading.local()
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.connection().executescript(SCHEMA)
+            self.prune()
+
+    def prune(self):
+        """Forget idle per-client buckets (a missing bucket starts full) and long-expired entries"""
+        conn = self.connection()
+        cutoff = time.time() - PRUNE_AFTER
+        conn.execute('DELETE FROM token_buckets WHERE updated_at < ?', (cutoff,))
+        conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (cutoff,))
+
+    def wrote(self):
+        """Count a write, pruning every PRUNE_EVERY writes in this process"""
+        if next(self._writes) % PRUNE_EVERY == 0:
+            self.prune()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def make_cache(self, namespace: str, maxsize: int = 1024, ttl: float = 300, stale_ttl: float = 0):
+        """A TTLCache, shared across workers when the backend is enabled"""
+        if self.enabled:
+            return SharedTTLCache(self, namespace, maxsize=maxsize, ttl=ttl, stale_ttl=stale_ttl)
+        return TTLCache(maxsize=maxsize, ttl=ttl, stale_ttl=stale_ttl)
+
+    def make_bucket(self, name: str, rate: float, capacity: float):
+        """A TokenBucket, shared across workers when the backend is enabled"""
+        if self.enabled:
+            return SharedTokenBucket(self, name, rate=rate, capacity=capacity)
+        return TokenBucket(rate=rate, capacity=capacity)
+
+
+class SharedTTLCache:
+    """
+    TTLCache interface over the shared database.
+
+    Values are pickled. Eviction beyond `maxsize` drops the least recently
+    written entries; hit/miss counters are per process.
+    """
+
+    def __init__(self, state: SharedState, namespace: str, maxsize: int = 1024, ttl: float = 300,
+                 stale_ttl: float = 0):
+        self.state = state
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(key: Hashable) -> bytes:
+        return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _lookup(self, key: Hashable, allow_stale: bool):
+        now = time.time()
+        row = self.state.connection().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+            (self.namespace, self._key(key))).fetchone()
+        if row is None or now >= row[1] + self.stale_ttl or (now >= row[1] and not allow_stale):
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key, allow_stale=False)
+        return default if value is _MISSING else value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key, allow_stale=True)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        conn = self.state.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)',
+                         (self.namespace, self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                          expires_at, now))
+            conn.execute('DELETE FROM cache_entries WHERE rowid IN ('
+                         'SELECT rowid FROM cache_entries WHERE namespace = ? '
+                         'ORDER BY written_at DESC LIMIT -1 OFFSET ?)', (self.namespace, self.maxsize))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self.state.wrote()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        value = self.get_stale(key, _MISSING)
+        self.state.connection().execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                                        (self.namespace, self._key(key)))
+        return default if value is _MISSING else value
+
+    def clear(self):
+        self.state.connection().execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.state.connection().execute(
+            'SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at + ? > ?',
+            (self.namespace, self.stale_ttl, time.time())).fetchone()[0]
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose level lives in the shared database, so every worker draws from one bucket"""
+
+    def __init__(self, state: SharedState, name: str, rate: float, capacity: float):
+        super().__init__(rate=rate, capacity=capacity)
+        self.state = state
+        self.name = name
+
+    def _update(self, tokens: float = 0, reserve: float = 0, take: bool = False):
+        """Refill, optionally take tokens; returns (taken, level before taking)"""
+        now = time.time()
+        conn = self.state.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM token_buckets WHERE name = ?',
+                               (self.name,)).fetchone()
+            level = self.capacity if row is None else \
+                min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+            taken = take and level - tokens >= reserve
+            conn.execute('INSERT OR REPLACE INTO token_buckets VALUES (?, ?, ?)',
+                         (self.name, level - tokens if taken else level, now))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self.state.wrote()
+        return taken, level
+
+    @property
+    def tokens(self) -> float:
+        return self._update()[1]
+
+    def try_acquire(self, tokens: float = 1, reserve: float = 0) -> bool:
+        return self._update(tokens, reserve, take=True)[0]
+
+    def wait_time(self, tokens: float = 1, reserve: float = 0) -> float:
+        missing = tokens + reserve - self.tokens
+        return max(0.0, missing / self.rate) if self.rate else float('inf')
+
+
+# Global shared state backend
+shared_state = SharedState()
@@ -0,0 +1,161 @@
+"""
+Autocomplete index for case types and previously fetched cases
+"""
+
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+CASE_TYPE = 'case_type'
+CASE = 'case'
+
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form used for prefix matching"""
+    return ' '.join(text.upper().split())
+
+
+class PrefixIndex:
+    """
+    Sorted array of (normalized key, display text, entry) searched with bisect.
+
+    A prefix lookup is one binary search plus a scan of at most `limit`
+    matches; new entries are inserted in place so the index stays current
+    without rebuilding. (key, text) pairs are unique, so tuple comparison
+    never reaches the entry dicts.
+    """
+
+    def __init__(self):
+        self._rows = []
+        self._keys = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, key: str, entry: Dict) -> bool:
+        row = (normalize(key), entry['text'])
+        with self._lock:
+            if row in self._keys:
+                return False
+            self._keys.add(row)
+            bisect.insort(self._rows, row + (entry,))
+        return True
+
+    def bulk_load(self, items):
+        """Add many (key, entry) pairs with a single sort"""
+        with self._lock:
+            for key, entry in items:
+                row = (normalize(key), entry['text'])
+                if row not in self._keys:
+                    self._keys.add(row)
+                    self._rows.append(row + (entry,))
+            self._rows.sort()
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict]:
+        prefix = normalize(prefix)
+        results = []
+        seen = set()
+        with self._lock:
+            index = bisect.bisect_left(self._rows, (prefix,))
+            while index < len(self._rows) and len(results) < limit:
+                key, text, entry = self._rows[index]
+                if not key.startswith(prefix):
+                    break
+                if text not in seen:
+                    seen.add(text)
+                    results.append(entry)
+                index += 1
+        return results
+
+
+class CaseSuggester:
+    """
+    Builds the autocomplete index lazily and keeps it updated as cases are found.
+
+    The index is rebuilt on startup from the case type catalog, the demo
+    cases and successful QueryLog rows. Cases found through /api/search are
+    added while the process runs but are not logged, so they are not kept
+    across restarts.
+    """
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def case_type_entries(case_types: Dict[str, str]):
+        for code, name in case_types.items():
+            yield code, {'text': code, 'kind': CASE_TYPE, 'label': name, 'case_type': code}
+            # Also match on the full name, e.g. "writ" -> WP(C)
+            yield name, {'text': code, 'kind': CASE_TYPE, 'label': name, 'case_type': code}
+
+    @staticmethod
+    def case_entries(case_type: str, case_number: str, filing_year: str):
+        entry = {
+            'text': f"{case_type} {case_number}/{filing_year}",
+            'kind': CASE,
+            'case_type': case_type,
+            'case_number': case_number,
+            'filing_year': filing_year
+        }
+        yield entry['text'], entry
+        # Also match on the number alone, e.g. "1234" -> WP(C) 1234/2024
+        yield f"{case_number}/{filing_year}", entry
+
+    def ensure_loaded(self):
+        """Build the index from the case type catalog and QueryLog on first use"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            from .ai_bot import ai_bot
+            from .models import QueryLog
+            from .scraper import CASE_TYPES, DEMO_CASES
+            from . import db
+
+            case_types = dict(CASE_TYPES)
+            for code, info in ai_bot.case_type_info.items():
+                case_types.setdefault(code, info.get('full_name', code))
+
+            items = list(self.case_type_entries(case_types))
+            for case in DEMO_CASES:
+                items.extend(self.case_entries(*case))
+            try:
+                found = (db.session.query(QueryLog.case_type, QueryLog.case_number, QueryLog.filing_year)
+                         .filter(QueryLog.status == 'success')
+                         .distinct()
+                         .yield_per(1000))
+                for case in found:
+                    items.extend(self.case_entries(*case))
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.warning(f"Autocomplete built without search history: {e}")
+
+            self.index.bulk_load(items)
+            self._loaded = True
+
+    def add_case(self, case_type: str, case_number: str, filing_year: str):
+        """Record a newly fetched case (no-op until the index is built)"""
+        if not self._loaded:
+            return
+        for key, entry in self.case_entries(case_type, case_number, filing_year):
+            self.index.add(key, entry)
+
+    def suggest(self, prefix: Optional[str], limit: int = 10) -> List[Dict]:
+        if not prefix or not prefix.strip():
+            return []
+        self.ensure_loaded()
+        return self.index.search(prefix, limit)
+
+
+# Global suggester instance
+case_suggester = CaseSuggester()
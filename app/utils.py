@@ -0,0 +1,90 @@
+"""
+Small shared helpers
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Low-priority callers can pass `reserve` to try_acquire() so they only
+    take a token while that many remain for everyone else.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, tokens: float = 1, reserve: float = 0) -> bool:
+        """Take tokens if available without blocking"""
+        with self._lock:
+            self._refill()
+            if self._tokens - tokens < reserve:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def wait_time(self, tokens: float = 1, reserve: float = 0) -> float:
+        """Seconds until try_acquire(tokens, reserve) could succeed"""
+        with self._lock:
+            self._refill()
+            missing = tokens + reserve - self._tokens
+            return max(0.0, missing / self.rate) if self.rate else float('inf')
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available; False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            delay = self.wait_time(tokens)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(max(delay, 0.001))
+        return True
+
+
+class LatencyTracker:
+    """Rolling window of recent durations with percentile lookup"""
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None if it is empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[rank - 1]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: legacy case dicts vs. slotted CaseRecord objects
+"""
+
+import sys
+import time
+import tracemalloc
+
+from app.records import CaseRecord
+
+
+def build_dicts(count):
+    """Build case data the way the scraper used to return it"""
+    return [
+        {
+            'case_title': f"WP(C) {i}/2024",
+            'parties': f"Petitioner {i} vs. State of Delhi & Ors.",
+            'filing_date': f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            'next_hearing': f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            'latest_order': {
+                'date': f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                'pdf_url': f"https://delhihighcourt.nic.in/orders/{i}.pdf"
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def build_records(count):
+    """Build the same cases as CaseRecord objects"""
+    return [CaseRecord.from_dict(data) for data in build_dicts(count)]
+
+
+def measure(builder, count):
+    """Return (bytes retained, seconds) for building `count` cases"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    cases = builder(count)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cases
+    return current, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"📏 Memory benchmark for {count:,} cases")
+    print("=" * 50)
+
+    dict_bytes, dict_time = measure(build_dicts, count)
+    record_bytes, record_time = measure(build_records, count)
+
+    print(f"   dict:       {dict_bytes / count:8.1f} bytes/case  ({dict_time:.2f}s to build)")
+    print(f"   CaseRecord: {record_bytes / count:8.1f} bytes/case  ({record_time:.2f}s to build)")
+    print(f"   Savings:    {(dict_bytes - record_bytes) / count:8.1f} bytes/case "
+          f"({100 * (1 - record_bytes / dict_bytes):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
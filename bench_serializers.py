@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: stdlib json vs. orjson vs. MessagePack on API payloads
+"""
+
+import gzip
+import json
+import sys
+import time
+
+from app.ai_bot import ai_bot
+from app.scraper import get_demo_case_data
+from app.serializers import _default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def build_payload():
+    """A /api/search response: case details plus the AI analysis"""
+    result = get_demo_case_data('WP(C)', '1234', '2024')
+    return {'result': result.to_dict(), 'ai_analysis': ai_bot.analyze_case(result)}
+
+
+def codecs():
+    yield 'json', (lambda obj: json.dumps(obj, default=_default).encode('utf-8')), json.loads
+    if orjson is not None:
+        yield 'orjson', (lambda obj: orjson.dumps(obj, default=_default)), orjson.loads
+    if msgpack is not None:
+        yield 'msgpack', (lambda obj: msgpack.packb(obj, default=_default, use_bin_type=True)), \
+            (lambda data: msgpack.unpackb(data, raw=False))
+
+
+def timeit(func, arg, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(arg)
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    payload = build_payload()
+
+    print(f"📦 Serialization benchmark ({rounds:,} rounds per codec)")
+    print("=" * 64)
+    print(f"   {'codec':8} {'encode µs':>10} {'decode µs':>10} {'bytes':>8} {'gzip bytes':>11}")
+
+    for name, encode, decode in codecs():
+        data = encode(payload)
+        assert decode(data) == json.loads(json.dumps(payload, default=_default))
+        encode_us = timeit(encode, payload, rounds)
+        decode_us = timeit(decode, data, rounds)
+        print(f"   {name:8} {encode_us:10.1f} {decode_us:10.1f} {len(data):8} {len(gzip.compress(data)):11}")
+
+    if orjson is None or msgpack is None:
+        print("\n⚠️  Install orjson and msgpack to compare all codecs")
+
+
+if __name__ == "__main__":
+    main()
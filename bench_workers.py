@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling benchmark for serve.py from 1 to N worker processes
+"""
+
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+PAYLOAD = json.dumps({'case_data': {
+    'case_title': 'WP(C) 1234/2024',
+    'parties': 'Rajesh Kumar vs. State of Delhi & Ors.',
+    'filing_date': '2024-01-15',
+    'next_hearing': '2024-08-20',
+    'latest_order': {'date': '2024-07-15', 'pdf_url': '#'}
+}})
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client(port, duration, results):
+    """Issue /api/analyze requests back to back for `duration` seconds"""
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        try:
+            conn.request('POST', '/api/analyze', PAYLOAD, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+        finally:
+            conn.close()
+    results.put((done, errors))
+
+
+def measure(workers, duration, state_dir):
+    port = free_port()
+    env = dict(os.environ, COURT_PORT=str(port), COURT_WORKERS=str(workers),
+               COURT_SHARED_STATE_PATH=json.dumps(os.path.join(state_dir, f"state-{workers}.db")))
+    server = subprocess.Popen([sys.executable, 'serve.py'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        time.sleep(0.5 * workers)  # let every worker finish create_app
+
+        results = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=client, args=(port, duration, results))
+                   for _ in range(max(4, workers * 2))]
+        for process in clients:
+            process.start()
+        totals = [results.get() for _ in clients]
+        for process in clients:
+            process.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    done = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return done / duration, errors
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    print(f"⚙️  Worker scaling benchmark: /api/analyze, {duration:.0f}s per step, up to {max_workers} workers")
+    print("   (load is generated on the same host, so it competes with the server for cores)")
+    print("=" * 64)
+    print(f"   {'workers':>7} {'req/s':>10} {'speedup':>8} {'efficiency':>11} {'errors':>7}")
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as state_dir:
+        for workers in range(1, max_workers + 1):
+            rate, errors = measure(workers, duration, state_dir)
+            baseline = baseline or rate
+            speedup = rate / baseline if baseline else 0.0
+            print(f"   {workers:>7} {rate:>10.1f} {speedup:>7.2f}x {100 * speedup / workers:>10.0f}% {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ def test_demo_cases():
         result, error = fetch_case_details(case_type, case_number, filing_year)
         
         if result:
+            result = result.to_dict()
             print("✅ Case Found!")
             print(f"   Title: {result['case_title']}")
             print(f"   Parties: {result['parties']}")
@@ -3,16 +3,34 @@
 Database initialization script for Court Data Fetcher
 """
 
+from sqlalchemy import inspect, text
+
 from app import create_app, db
+from app.models import QueryDailyRollup, QueryRollupTotal
+from app.retention import rebuild_rollup_totals
+
+def upgrade_query_log():
+    """Add columns and indexes introduced after the first release"""
+    columns = {column['name'] for column in inspect(db.engine).get_columns('query_log')}
+    with db.engine.begin() as connection:
+        if 'duration_ms' not in columns:
+            connection.execute(text("ALTER TABLE query_log ADD COLUMN duration_ms FLOAT"))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_query_log_timestamp ON query_log (timestamp)"))
 
 def init_database():
     """Initialize the database with required tables"""
     app = create_app()
     with app.app_context():
         db.create_all()
+        upgrade_query_log()
+        if QueryRollupTotal.query.first() is None and QueryDailyRollup.query.first() is not None:
+            rebuild_rollup_totals()
         print("✅ Database initialized successfully!")
         print("📊 Tables created:")
         print("   - query_log")
+        print("   - query_daily_rollup")
+        print("   - query_rollup_total")
 
 if __name__ == "__main__":
-    init_database() 
\ No newline at end of file
+    init_database() 
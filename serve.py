@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Production entry point: preforking multi-worker server.
+
+Settings come from the environment:
+    COURT_HOST      bind address (default 127.0.0.1)
+    COURT_PORT      bind port (default 8000)
+    COURT_WORKERS   worker processes (default: CPU count)
+    COURT_THREADS   1 to serve each worker's requests in threads (default 1)
+Any other COURT_<SETTING> overrides the app config (see create_app).
+"""
+
+import os
+
+from app import create_app
+from app.server import production_config, serve
+
+
+def main():
+    host = os.environ.get('COURT_HOST', '127.0.0.1')
+    port = int(os.environ.get('COURT_PORT', 8000))
+    workers = int(os.environ.get('COURT_WORKERS', 0)) or os.cpu_count() or 1
+    threaded = os.environ.get('COURT_THREADS', '1') != '0'
+    overrides = production_config(workers)
+
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers")
+    serve(lambda: create_app(overrides), host=host, port=port, workers=workers, threaded=threaded)
+
+
+if __name__ == "__main__":
+    main()
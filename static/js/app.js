@@ -0,0 +1,77 @@
+// Initialize AOS animations
+AOS.init({
+    duration: 800,
+    easing: 'ease-in-out',
+    once: true
+});
+
+// Add loading animation to buttons
+document.addEventListener('DOMContentLoaded', function() {
+    const buttons = document.querySelectorAll('.btn');
+    buttons.forEach(button => {
+        button.addEventListener('click', function() {
+            if (!this.classList.contains('btn-close')) {
+                this.classList.add('pulse');
+                setTimeout(() => {
+                    this.classList.remove('pulse');
+                }, 600);
+            }
+        });
+    });
+
+    // Add success animation to forms
+    const forms = document.querySelectorAll('form');
+    forms.forEach(form => {
+        form.addEventListener('submit', function() {
+            const submitBtn = this.querySelector('button[type="submit"]');
+            if (submitBtn) {
+                submitBtn.innerHTML = '<span class="loading-spinner me-2"></span>Processing...';
+                submitBtn.disabled = true;
+            }
+        });
+    });
+
+    // Animate elements on scroll
+    const observerOptions = {
+        threshold: 0.1,
+        rootMargin: '0px 0px -50px 0px'
+    };
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                entry.target.classList.add('animated');
+            }
+        });
+    }, observerOptions);
+
+    document.querySelectorAll('.animate-on-scroll').forEach(el => {
+        observer.observe(el);
+    });
+
+    // Add glow effect on hover for cards
+    const cards = document.querySelectorAll('.card');
+    cards.forEach(card => {
+        card.addEventListener('mouseenter', function() {
+            this.classList.add('glow');
+        });
+        card.addEventListener('mouseleave', function() {
+            this.classList.remove('glow');
+        });
+    });
+});
+
+// Success/Error animations
+function showSuccessAnimation(element) {
+    element.classList.add('success-animation');
+    setTimeout(() => {
+        element.classList.remove('success-animation');
+    }, 600);
+}
+
+function showErrorAnimation(element) {
+    element.classList.add('error-shake');
+    setTimeout(() => {
+        element.classList.remove('error-shake');
+    }, 500);
+}
@@ -85,5 +85,38 @@ def test_ai_bot():
     print("🎉 AI Bot is working perfectly!")
     print("🌐 Try it in your web application at: http://127.0.0.1:5000")
 
+def test_intent_matching():
+    """Test compiled intent matching and batch answers"""
+    from app.ai_bot import ai_bot, QUESTION_INTENTS
+    from app.intents import KeywordAutomaton
+
+    assert KeywordAutomaton(['he', 'she', 'hers']).find('ushers') == {'he', 'she', 'hers'}
+    assert QUESTION_INTENTS.match('When was it filed?') == 'filing_date'
+    assert QUESTION_INTENTS.match('Any recommendations?') == 'recommendations'
+    assert QUESTION_INTENTS.match('What is the next hearing for this case?') == 'case_overview'
+    assert QUESTION_INTENTS.match('Hello') is None
+
+    case = {'case_title': 'WP(C) 1234/2024', 'parties': 'A vs. B',
+            'filing_date': '2024-01-15', 'next_hearing': '2024-08-20'}
+    context = ai_bot.build_context(case)
+    answers = [ai_bot.answer_question(q, case, context) for q in ['When was it filed?', 'Any advice?', 'Hello']]
+    assert answers[0] == 'The case was filed on 2024-01-15.'
+    assert 'Focus on fundamental rights violation' in answers[1]
+    assert answers[2].startswith('I can help you')
+    print("✅ Intent matching working!")
+
+def test_unparseable_filing_date():
+    """Questions about a case with a bad filing date still get answers"""
+    from app.ai_bot import ai_bot
+
+    case = {'case_title': 'WP(C) 1234/2024', 'parties': 'A vs. B',
+            'filing_date': '15/13/2020', 'next_hearing': '2024-08-20'}
+    assert ai_bot.answer_question('When was it filed?', case) == 'The case was filed on 15/13/2020.'
+    assert 'legal expert' in ai_bot.answer_question('Any advice?', case)
+    assert 'error' not in ai_bot.analyze_case(case)
+    print("✅ Unparseable filing date handled!")
+
 if __name__ == "__main__":
-    test_ai_bot() 
\ No newline at end of file
+    test_ai_bot()
+    test_intent_matching()
+    test_unparseable_filing_date()
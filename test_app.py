@@ -56,6 +56,591 @@ def test_scraper():
         print(f"❌ Scraper test failed: {e}")
         return False
 
+def test_case_record():
+    """Test CaseRecord parses dates once and round-trips to the legacy dict"""
+    from datetime import date
+    from app.records import CaseRecord, NOT_AVAILABLE
+    from app.scraper import get_demo_case_data
+
+    record = get_demo_case_data("WP(C)", "1234", "2024")
+    assert record.filing_date == date(2024, 1, 15)
+    assert record.case_type == "WP(C)"
+    assert CaseRecord.from_dict(record.to_dict()) == record
+
+    legacy = CaseRecord.from_dict({'case_title': 'CIVIL 1/2020', 'filing_date': '15/01/2020',
+                                   'next_hearing': NOT_AVAILABLE})
+    assert legacy.filing_date == date(2020, 1, 15)
+    assert legacy.next_hearing is None
+    assert legacy.to_dict()['parties'] == NOT_AVAILABLE
+    print("✅ CaseRecord round-trip successful!")
+
+def test_lookup_validation_and_negative_cache():
+    """Test impossible lookups are rejected and upstream misses are cached"""
+    from app import scraper as scraper_module
+
+    result, error = scraper_module.fetch_case_details("NOPE", "1", "2024")
+    assert result is None and "case type" in error
+    result, error = scraper_module.fetch_case_details("WP(C)", "1", "1900")
+    assert result is None and "Filing year" in error
+
+    calls = []
+    def fake_search(case_type, case_number, filing_year):
+        calls.append(case_number)
+        return None, "No case details found. Please verify the case information."
+
+    original_search = scraper_module.scraper.search_case
+    scraper_module.scraper.search_case = fake_search
+    scraper_module.case_cache.clear()
+    try:
+        for _ in range(3):
+            result, error = scraper_module.fetch_case_details("LPA", "77", "2020")
+            assert result is None and error.startswith("No case details found")
+        assert calls == ["77"]
+
+        portal = scraper_module.DelhiHighCourtScraper()
+        assert portal.parse_search_results('<div class="error">No Record Found</div>') == (None, "No Record Found")
+        result, error = portal.parse_search_results('<div class="error">Invalid captcha</div>')
+        assert error == "Portal error: Invalid captcha" and scraper_module.is_transient_error(error)
+    finally:
+        scraper_module.scraper.search_case = original_search
+        scraper_module.case_cache.clear()
+    print("✅ Validation and negative cache working!")
+
+def test_prefetched_pdf_download(tmp_path):
+    """Test /download serves a prefetched PDF from the local cache"""
+    import os
+    import time
+    from app import create_app
+    from app.prefetch import PdfPrefetcher, pdf_prefetcher
+
+    cache_dir = str(tmp_path)
+    try:
+        app = create_app({'PDF_PREFETCH_ENABLED': True, 'PDF_CACHE_DIR': cache_dir,
+                          'PDF_CACHE_MAX_BYTES': 20})
+        pdf_url = "https://delhihighcourt.nic.in/orders/demo.pdf"
+        pdf_prefetcher.store(pdf_url, b"%PDF-1.4 demo")
+        hits = pdf_prefetcher.hits
+
+        response = app.test_client().get(f"/download/{pdf_url}")
+        assert response.status_code == 200
+        assert response.data == b"%PDF-1.4 demo"
+        assert pdf_prefetcher.hits == hits + 1
+        assert pdf_prefetcher.enqueue(pdf_url) is False  # already cached
+        response.close()
+
+        os.utime(pdf_prefetcher.cache_path(pdf_url), (0, time.time() - 60))
+        other_url = "https://delhihighcourt.nic.in/orders/other.pdf"
+        pdf_prefetcher.store(other_url, b"%PDF-1.4 other")
+        assert pdf_prefetcher.lookup(pdf_url) is None  # oldest evicted past PDF_CACHE_MAX_BYTES
+        assert pdf_prefetcher.lookup(other_url) is not None
+
+        expiring = PdfPrefetcher()
+        expiring.init_app(create_app({'PDF_CACHE_DIR': cache_dir, 'PDF_CACHE_MAX_AGE': 0}))
+        assert expiring.lookup(other_url) is None  # expired
+    finally:
+        # Point the global prefetcher back at the default settings
+        create_app()
+    print("✅ Prefetched PDF served from cache!")
+
+def test_request_profiler():
+    """Test the token header profiles a request and lists it at /admin/profiles"""
+    import tempfile
+    import time
+    from app import create_app
+    from app.backends import CourtBackend, DemoBackend, backend_registry
+    from app.records import CaseRecord
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        app = create_app({'PROFILE_TOKEN': 'secret', 'PROFILE_DIR': profile_dir, 'PROFILE_INTERVAL': 0.001})
+        client = app.test_client()
+        response = client.post('/api/analyze', json={'case_data': {'case_title': 'CIVIL 9999/2022'}},
+                               headers={'X-Profile-Token': 'secret'})
+        assert response.status_code == 200
+
+        profiles = client.get('/admin/profiles').get_json()['profiles']
+        assert profiles and profiles[0]['endpoint'] == 'main.analyze_case'
+        assert client.get(f"/admin/profiles/{profiles[0]['file']}").status_code == 200
+
+        # Backend calls run on pool threads, which are sampled with the request
+        def spin_lookup(case_type, case_number, filing_year):
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            return CaseRecord(case_title=f"{case_type} {case_number}/{filing_year}"), None
+
+        backends = backend_registry.backends
+        demo, spinning = DemoBackend(), CourtBackend()
+        spinning.lookup = spin_lookup
+        backend_registry.backends = [demo, spinning]
+        try:
+            query = {'case_type': 'WP(C)', 'case_number': '8181', 'filing_year': '2020'}
+            response = client.post('/api/search', json=query, headers={'X-Profile-Token': 'secret'})
+            assert response.status_code == 200
+            assert demo.stats()['calls'] == 1  # the offline lookup runs once per search
+        finally:
+            backend_registry.backends = backends
+        profiles = client.get('/admin/profiles').get_json()['profiles']
+        search_profile = next(p for p in profiles if p['endpoint'] == 'main.api_search')
+        assert 'spin_lookup' in client.get(f"/admin/profiles/{search_profile['file']}").get_data(as_text=True)
+
+    app = create_app()
+    assert not getattr(app.view_functions['main.api_search'], '__wrapped__', None)
+    print("✅ Request profiler working!")
+
+def test_query_log_rollup():
+    """Test old QueryLog rows are rolled into daily aggregates served by /api/stats"""
+    from datetime import datetime, timedelta
+    from app import create_app, db
+    from app.models import QueryLog, QueryDailyRollup, QueryRollupTotal
+    from app.retention import rebuild_rollup_totals, rollup_query_logs
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with app.app_context():
+        db.create_all()
+        old = datetime.utcnow() - timedelta(days=40)
+        for duration, status in [(80, 'success'), (150, 'success'), (4000, 'error')]:
+            db.session.add(QueryLog(case_type='WP(C)', case_number='1', filing_year='2024',
+                                    timestamp=old, status=status, duration_ms=duration))
+        db.session.add(QueryLog(case_type='LPA', case_number='2', filing_year='2024',
+                                timestamp=datetime.utcnow(), status='success', duration_ms=30))
+        db.session.commit()
+
+        summary = rollup_query_logs(retention_days=30)
+        assert summary['rows'] == 3 and summary['days'] == 1
+        assert QueryLog.query.count() == 1
+        assert QueryDailyRollup.query.count() == 2
+
+        stats = app.test_client().get('/api/stats').get_json()
+        assert stats['total'] == 4
+        assert stats['by_case_type']['WP(C)'] == {'total': 3, 'success': 2, 'error': 1}
+        assert stats['success_rate'] == 0.75
+        assert stats['latency_ms']['p99'] == 5000.0
+        assert QueryRollupTotal.query.count() == 2
+
+        assert rebuild_rollup_totals() == 2
+        assert app.test_client().get('/api/stats').get_json() == stats
+        assert app.test_client().get('/api/stats?days=7').get_json()['total'] == 1
+        for days in ('0', '-3'):
+            assert app.test_client().get(f'/api/stats?days={days}').status_code == 400
+    print("✅ QueryLog rollup working!")
+
+def test_hedged_search():
+    """Test a slow search is hedged on a second session and the fast answer wins"""
+    import itertools
+    import time
+    from app.hedging import HedgingPolicy
+
+    sessions = itertools.count()
+    policy = HedgingPolicy()
+    policy.configure(lambda: next(sessions), enabled=True, pool_size=2, default_delay=0.05)
+
+    def search(session, case_number):
+        if session == 0:
+            time.sleep(0.5)
+            return None, "Network error: slow"
+        return f"case {case_number}", None
+
+    started = time.perf_counter()
+    assert policy.run(search, "1234") == ("case 1234", None)
+    assert time.perf_counter() - started < 0.4
+    stats = policy.stats()
+    assert stats['hedges'] == 1 and stats['hedge_wins'] == 1
+
+    # Searches queued behind busy executor threads are not hedged for the wait
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest.mock import Mock
+    policy = HedgingPolicy()
+    policy.configure(Mock, enabled=True, pool_size=1, default_delay=0.1)
+    with ThreadPoolExecutor(max_workers=6) as callers:
+        answers = list(callers.map(lambda n: policy.run(lambda session, n: (n, time.sleep(0.06)), n), range(6)))
+    assert answers == [(n, None) for n in range(6)]
+    assert policy.stats()['hedges'] == 0
+    print("✅ Hedged search working!")
+
+def test_admission_control():
+    """Test bursts are shed with Retry-After while cached answers are still served"""
+    from app import create_app
+    from app import scraper as scraper_module
+    from app.records import CaseRecord
+
+    app = create_app({'ADMISSION_CLIENT_RATE': 0.01, 'ADMISSION_CLIENT_BURST': 1})
+    client = app.test_client()
+    original_search = scraper_module.scraper.search_case
+    scraper_module.scraper.search_case = lambda case_type, case_number, filing_year: \
+        (CaseRecord(case_title=f"{case_type} {case_number}/{filing_year}"), None)
+    scraper_module.case_cache.clear()
+    scraper_module.case_cache.store(scraper_module.case_cache.make_key("LPA", "12", "2020"),
+                                    CaseRecord(case_title="LPA 12/2020"), None)
+    try:
+        # Demo cases, cached answers and invalid inputs never reach upstream, so cost nothing
+        query = {'case_type': 'WP(C)', 'case_number': '1234', 'filing_year': '2024'}
+        for _ in range(3):
+            assert client.post('/api/search', json=query).status_code == 200
+        assert client.post('/api/search', json={'case_type': 'LPA', 'case_number': '12',
+                                                'filing_year': '2020'}).status_code == 200
+        assert client.post('/api/search', json={'case_type': 'NOPE', 'case_number': '1',
+                                                'filing_year': '2020'}).status_code == 400
+
+        # The one upstream lookup the burst allows
+        response = client.post('/api/search', json={'case_type': 'LPA', 'case_number': '98', 'filing_year': '2020'})
+        assert response.status_code == 200
+
+        response = client.post('/api/search', json={'case_type': 'LPA', 'case_number': '99', 'filing_year': '2020'})
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+
+        response = client.post('/api/search', json={'case_type': 'LPA', 'case_number': '12', 'filing_year': '2020'})
+        assert response.status_code == 200
+        assert response.get_json()['result']['case_title'] == "LPA 12/2020"
+    finally:
+        scraper_module.scraper.search_case = original_search
+        scraper_module.case_cache.clear()
+        create_app()
+    print("✅ Admission control working!")
+
+def test_bulk_ingest():
+    """Test bulk ingestion writes JSONL and QueryLog rows and resumes from its checkpoint"""
+    import json
+    import os
+    import tempfile
+    from app import create_app, db
+    from app.ingest import ingest_cases
+    from app.models import QueryLog
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    with tempfile.TemporaryDirectory() as work_dir, app.app_context():
+        db.create_all()
+        input_path = os.path.join(work_dir, 'cases.csv')
+        output_path = os.path.join(work_dir, 'results.jsonl')
+        with open(input_path, 'w', encoding='utf-8') as fh:
+            fh.write("case_type,case_number,filing_year\n"
+                     "WP(C),1234,2024\nCRL.A,5678,2023\nCIVIL,9999,2022\nWP(C),1234,2024\n")
+
+        summary = ingest_cases(input_path, output_path, concurrency=2, rate=100)
+        assert summary == {'processed': 3, 'failed': 0, 'skipped': 1}  # duplicate row skipped
+        with open(output_path, encoding='utf-8') as fh:
+            lines = [json.loads(line) for line in fh]
+        assert sorted(line['case_number'] for line in lines) == ['1234', '5678', '9999']
+        assert all(line['status'] == 'success' and line['result']['case_title'] for line in lines)
+        assert QueryLog.query.filter_by(status='success').count() == 3
+
+        summary = ingest_cases(input_path, output_path, concurrency=2, rate=100)
+        assert summary == {'processed': 0, 'failed': 0, 'skipped': 4}
+        with open(output_path, encoding='utf-8') as fh:
+            assert len(fh.readlines()) == 3
+        assert QueryLog.query.count() == 3
+    print("✅ Bulk ingestion and resume working!")
+
+def test_suggest():
+    """Test autocomplete matches case types, full names and fetched cases"""
+    from app import create_app
+    from app.suggest import case_suggester
+
+    app = create_app()
+    client = app.test_client()
+    texts = lambda prefix: [s['text'] for s in client.get(f'/api/suggest?prefix={prefix}').get_json()['suggestions']]
+
+    assert 'WP(C)' in texts('wp')
+    assert texts('writ') == ['WP(C)']
+    case_suggester.add_case('LPA', '4242', '2019')
+    assert texts('4242') == ['LPA 4242/2019']
+    assert texts('') == []
+
+    # Without a QueryLog table, autocomplete still serves case types and demo cases
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    case_suggester.__init__()
+    response = app.test_client().get('/api/suggest?prefix=1234')
+    assert response.status_code == 200
+    assert [s['text'] for s in response.get_json()['suggestions']] == ['WP(C) 1234/2024']
+    case_suggester.__init__()
+    print("✅ Autocomplete working!")
+
+def test_http_caching_and_compression():
+    """Test API responses carry ETags, honour If-None-Match and are gzipped"""
+    import gzip
+    import json
+    from app import create_app
+
+    client = create_app().test_client()
+    query = {'case_type': 'WP(C)', 'case_number': '1234', 'filing_year': '2024'}
+
+    response = client.post('/api/search', json=query, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'max-age' in response.headers['Cache-Control']
+    assert json.loads(gzip.decompress(response.data))['result']['case_title'] == 'WP(C) 1234/2024'
+    etag = response.headers['ETag']
+
+    response = client.get('/api/search', query_string=query, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.post('/api/search', json={'case_type': 'WP(C)'})
+    assert response.status_code == 400
+    assert response.headers['Cache-Control'] == 'no-store'
+    print("✅ HTTP caching and compression working!")
+
+def test_msgpack_responses():
+    """Test API responses are MessagePack-encoded when the client asks for it"""
+    import pytest
+    msgpack = pytest.importorskip('msgpack')  # optional dependency
+    from app import create_app
+
+    client = create_app().test_client()
+    query = {'case_type': 'WP(C)', 'case_number': '1234', 'filing_year': '2024'}
+
+    response = client.post('/api/search', json=query, headers={'Accept': 'application/msgpack'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    assert 'Accept' in response.headers['Vary']
+    assert msgpack.unpackb(response.data, raw=False)['result']['case_title'] == 'WP(C) 1234/2024'
+    assert response.headers['ETag'].endswith('-msgpack"')
+
+    response = client.post('/api/search', json=query)
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['result']['case_title'] == 'WP(C) 1234/2024'
+    print("✅ MessagePack responses working!")
+
+def test_case_contexts():
+    """Test /api/ask registers a case context and answers by context_id"""
+    from app import create_app
+
+    client = create_app().test_client()
+    case = {'case_title': 'WP(C) 1234/2024', 'parties': 'A vs. B', 'filing_date': '2024-01-15'}
+
+    data = client.post('/api/ask', json={'question': 'When was it filed?', 'case_data': case}).get_json()
+    assert data['answer'] == 'The case was filed on 2024-01-15.'
+    context_id = data['context_id']
+
+    data = client.post('/api/ask', json={'question': 'What case is this?', 'context_id': context_id}).get_json()
+    assert data['answer'] == 'This is a WP(C) 1234/2024 involving A vs. B.'
+
+    lookup = {'question': 'When was it filed?', 'case_type': 'WP(C)', 'case_number': '1234', 'filing_year': '2024'}
+    assert client.post('/api/ask', json=lookup).get_json()['context_id']
+
+    response = client.post('/api/ask', json={'question': 'Any advice?', 'context_id': 'expired'})
+    assert response.status_code == 404
+    assert response.get_json()['code'] == 'context_expired'
+
+    for body in ({'case_data': 'not a case'}, {'case_data': {}}, {'context_id': ['x']}, {}):
+        response = client.post('/api/ask', json=dict(body, question='status?'))
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+    for questions in ('abc', 5, ['ok', 7], []):
+        response = client.post('/api/ask/batch', json={'questions': questions, 'context_id': context_id})
+        assert response.status_code == 400
+    print("✅ Case contexts working!")
+
+def test_fragment_cache():
+    """Test repeat result pages are served from cached template fragments"""
+    from app import create_app
+    from app.fragments import fragment_cache
+
+    client = create_app().test_client()
+    form = {'case_type': 'WP(C)', 'case_number': '1234', 'filing_year': '2024'}
+
+    first = client.post('/', data=form).get_data(as_text=True)
+    hits = fragment_cache.stats()['by_name'].get('case_details', {}).get('hits', 0)
+    second = client.post('/', data=form).get_data(as_text=True)
+    assert first == second
+    assert fragment_cache.stats()['by_name']['case_details']['hits'] == hits + 1
+    assert fragment_cache.stats()['by_name']['ai_analysis']['hits'] >= 1
+    print("✅ Fragment cache working!")
+
+def test_static_assets(tmp_path):
+    """Test built assets get fingerprinted URLs and immutable precompressed responses"""
+    import gzip
+    from app import create_app
+    from app.assets import static_assets
+
+    app = create_app({'STATIC_BUILD_DIR': str(tmp_path)})
+    client = app.test_client()
+    assert '/static/css/app.css' in client.get('/').get_data(as_text=True)
+
+    try:
+        with app.app_context():
+            manifest = static_assets.build(app.static_folder)
+        assert manifest['css/app.css'].startswith('css/app.')
+
+        url = f"/assets/{manifest['css/app.css']}"
+        assert url in client.get('/').get_data(as_text=True)
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert b':root' in gzip.decompress(response.data)
+    finally:
+        # Stop later tests linking to assets in the removed build directory
+        create_app()
+    print("✅ Static asset pipeline working!")
+
+def test_shared_state(tmp_path):
+    """Test caches and rate limits are shared through the SQLite backend"""
+    import os
+    import time
+    from app import create_app
+    from app import shared_state as shared_state_module
+    from app.shared_state import SharedState
+
+    path = str(tmp_path / 'shared.db')
+    workers = []
+    try:
+        for _ in range(2):
+            state = SharedState()
+            state.init_app(create_app({'SHARED_STATE_ENABLED': True, 'SHARED_STATE_PATH': path}))
+            workers.append(state)
+
+        first, second = (state.make_cache('cases', ttl=60) for state in workers)
+        first.set(('WP(C)', '1234', '2024'), {'case_title': 'WP(C) 1234/2024'})
+        assert second.get(('WP(C)', '1234', '2024')) == {'case_title': 'WP(C) 1234/2024'}
+
+        first, second = (state.make_bucket('upstream', rate=0.001, capacity=2) for state in workers)
+        assert first.try_acquire() and second.try_acquire()
+        assert not first.try_acquire()
+
+        # Idle client buckets are pruned while the server runs, not only at startup
+        conn = workers[0].connection()
+        conn.execute('INSERT INTO token_buckets VALUES (?, ?, ?)', ('client:idle', 1.0, time.time() - 2 * 86400))
+        idle_bucket = lambda: conn.execute("SELECT COUNT(*) FROM token_buckets WHERE name = 'client:idle'").fetchone()[0]
+        for _ in range(shared_state_module.PRUNE_EVERY):
+            first.tokens
+        assert idle_bucket() == 0
+    finally:
+        # Point the global caches back at in-process state
+        create_app()
+
+    os.environ['COURT_CONTEXT_TTL'] = '60'
+    try:
+        assert create_app().config['CONTEXT_TTL'] == 60
+    finally:
+        del os.environ['COURT_CONTEXT_TTL']
+    print("✅ Shared state working!")
+
+def test_backend_fanout():
+    """Test searches fan out across backends with timeouts and merging"""
+    import time
+    from app import create_app
+    from app.backends import BackendRegistry, CourtBackend, DemoBackend, merge_records
+    from app.records import CaseRecord
+
+    class FakeBackend(CourtBackend):
+        def __init__(self, name, result=None, error=None, delay=0.0, authoritative=True, timeout=1.0):
+            super().__init__(timeout)
+            self.name, self.result, self.error = name, result, error
+            self.delay, self.authoritative = delay, authoritative
+            self.case_types = frozenset({'LPA'})
+
+        def lookup(self, case_type, case_number, filing_year):
+            time.sleep(self.delay)
+            return self.result, self.error
+
+    registry = BackendRegistry()
+    registry.init_app(create_app())
+    assert registry.search('WP(C)', '1234', '2024')[0].parties.startswith('Rajesh Kumar')
+
+    slow = FakeBackend('slow', delay=2.0, timeout=0.2)
+    partial = FakeBackend('partial', CaseRecord(case_title='LPA 7/2020'), authoritative=False)
+    fuller = FakeBackend('fuller', CaseRecord(case_title='LPA 7/2020', parties='A vs. B'), authoritative=False)
+    registry.backends = [DemoBackend(), slow, partial, fuller]
+    started = time.monotonic()
+    result, error = registry.search('LPA', '7', '2020')
+    assert time.monotonic() - started < 1.0
+    assert error is None and result.parties == 'A vs. B'
+    assert slow.stats()['timeouts'] == 1
+
+    registry.backends = [FakeBackend('down', error='Network error: refused'),
+                         FakeBackend('empty', error='No case details found')]
+    assert registry.search('LPA', '7', '2020') == (None, 'Network error: refused')
+    assert 'No court backend' in registry.search('CIVIL', '1', '2020')[1]
+
+    registry.backends = [FakeBackend('only', delay=2.0, timeout=0.2)]
+    started = time.monotonic()
+    assert 'timed out' in registry.search('LPA', '7', '2020')[1]
+    assert time.monotonic() - started < 1.0
+
+    # A backend's timeout starts when its call leaves the queue
+    registry.max_workers = 1
+    registry._executor = None
+    first = FakeBackend('first', CaseRecord(case_title='LPA 7/2020'), delay=0.3, authoritative=False)
+    queued = FakeBackend('queued', CaseRecord(case_title='LPA 7/2020', parties='A vs. B'), delay=0.05,
+                         authoritative=False, timeout=0.2)
+    registry.backends = [first, queued]
+    assert registry.search('LPA', '7', '2020') == (merge_records([first.result, queued.result]), None)
+    assert queued.stats()['timeouts'] == 0
+    print("✅ Backend fan-out working!")
+
+def test_streaming_export(tmp_path):
+    """Test history and case exports stream with filters"""
+    import csv
+    import io
+    import json
+    from datetime import datetime
+    from app import create_app, db
+    from app.models import QueryLog
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path}/export.db"})
+    with app.app_context():
+        db.create_all()
+        found = json.dumps({'result': {'case_title': 'LPA 7/2020', 'parties': 'A vs. B',
+                                       'latest_order': {'date': '2024-07-15', 'pdf_url': '#'}}})
+        for i in range(5):
+            db.session.add(QueryLog(case_type='LPA' if i % 2 else 'FAO', case_number=str(i), filing_year='2020',
+                                    timestamp=datetime(2024, 1, 1 + i), status='success' if i else 'error',
+                                    raw_response=found))
+        db.session.commit()
+
+    client = app.test_client()
+    response = client.get('/api/export/history?format=csv&since=2024-01-02&until=2024-01-04')
+    assert response.status_code == 200 and response.is_streamed
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['case_number'] for row in rows] == ['1', '2', '3']
+
+    response = client.get('/api/export/cases?format=jsonl&case_type=LPA')
+    cases = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [case['case_number'] for case in cases] == ['1', '3']
+    assert cases[0]['latest_order_date'] == '2024-07-15'
+
+    assert client.get('/api/export/history?since=yesterday').status_code == 400
+    assert client.get('/api/export/cases?status=error').status_code == 400
+
+    app.config['ADMIN_TOKEN'] = 'secret'
+    assert client.get('/api/export/history').status_code == 403
+    assert client.get('/api/export/history', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    print("✅ Streaming export working!")
+
+def test_parquet_export(tmp_path):
+    """Test the Parquet export streams a file pyarrow can read back"""
+    import pytest
+    pyarrow = pytest.importorskip('pyarrow')  # optional dependency
+    import pyarrow.parquet
+    from datetime import datetime
+    from app import create_app, db
+    from app.export import HISTORY_FIELDS, export_stream, iter_parquet, iter_rows
+    from app.models import QueryLog
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path}/export.db"})
+    with app.app_context():
+        db.create_all()
+        for i in range(25):
+            db.session.add(QueryLog(case_type='LPA', case_number=str(i), filing_year='2020',
+                                    timestamp=datetime(2024, 1, 1), status='success', duration_ms=float(i)))
+        db.session.commit()
+
+        path = tmp_path / 'history.parquet'
+        with open(path, 'wb') as fh:
+            for chunk in export_stream('history', 'parquet', {}):
+                fh.write(chunk)
+        # Several row groups, each drained from the sink as it is written
+        grouped = tmp_path / 'grouped.parquet'
+        grouped.write_bytes(b''.join(iter_parquet(iter_rows('history', {}), HISTORY_FIELDS, group_rows=10)))
+    table = pyarrow.parquet.read_table(path)
+    assert table.num_rows == 25
+    assert table.column('case_number').to_pylist() == [str(i) for i in range(25)]
+    assert pyarrow.parquet.ParquetFile(grouped).num_row_groups == 3
+    assert pyarrow.parquet.read_table(grouped).equals(table)
+    print("✅ Parquet export working!")
+
 def main():
     """Run all tests"""
     print("🧪 Testing Court Data Fetcher Application")